@@ -1,10 +1,22 @@
 # backend/app/bonus.py
 from __future__ import annotations
 
+import reprlib
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 
+import numpy as np
+
+# numba is optional; without it the numeric core runs as plain NumPy.
+try:
+    from numba import njit  # type: ignore
+except Exception:
+    def njit(*args, **kwargs):  # type: ignore
+        def wrap(fn):
+            return fn
+        return wrap
+
 
 def _safe_float(x: Any) -> Optional[float]:
     try:
@@ -21,13 +33,34 @@ def _round2(x: Optional[float]) -> Optional[float]:
     return float(f"{x:.3f}")  # keep a few decimals (your outputs often have 3)
 
 
-def _get_in(d: Dict[str, Any], path: List[str], default=None):
-    cur: Any = d
-    for p in path:
-        if not isinstance(cur, dict) or p not in cur:
-            return default
-        cur = cur[p]
-    return cur
+# Bounded repr for citation snippets: large nested provenance (HTML blobs) is
+# truncated while formatting instead of being fully stringified and sliced.
+_SNIPPET_REPR = reprlib.Repr()
+_SNIPPET_REPR.maxstring = 200
+_SNIPPET_REPR.maxdict = 6
+_SNIPPET_REPR.maxlist = 6
+_SNIPPET_REPR.maxother = 200
+
+# Check statuses
+PASS, WARN, FAIL = "pass", "warn", "fail"
+
+# Output field -> candidate keys in built_capital_structure.json (first numeric hit wins)
+_FIELD_KEYS: Dict[str, Tuple[str, ...]] = {
+    "total_debt": ("total_debt_mm", "total_debt"),
+    "cash": ("cash_and_cash_equivalents_mm", "cash_mm", "cash_and_cash_equivalents"),
+    "nci": ("noncontrolling_interests_mm", "nci_mm", "noncontrolling_interests"),
+    "market_cap": ("market_cap_mm", "market_cap"),
+    "net_debt": ("net_debt_mm", "net_debt"),
+    "ev": ("enterprise_value_mm", "enterprise_value"),
+}
+
+
+def _dict_instruments(built: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """built["instruments"] filtered to dict entries, computed once per public call."""
+    instruments = built.get("instruments") or []
+    if not isinstance(instruments, list):
+        return []
+    return [i for i in instruments if isinstance(i, dict)]
 
 
 def build_citations(built: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -40,7 +73,8 @@ def build_citations(built: Dict[str, Any]) -> List[Dict[str, Any]]:
     citations: List[Dict[str, Any]] = []
 
     # --- Cash + NCI citations from balance sheet provenance (already present)
-    bs_prov = _get_in(built, ["provenance", "balance_sheet"], {}) or {}
+    prov_root = built.get("provenance")
+    bs_prov = (prov_root.get("balance_sheet") if isinstance(prov_root, dict) else None) or {}
 
     cash = bs_prov.get("cash_and_cash_equivalents", {})
     if isinstance(cash, dict) and cash:
@@ -50,7 +84,7 @@ def build_citations(built: Dict[str, Any]) -> List[Dict[str, Any]]:
                 "file": "balance_sheet.json",
                 "kind": "json",
                 "where": cash.get("source_label") or cash.get("match_label") or "balance_sheet.json",
-                "snippet": str(cash)[:400],
+                "snippet": _SNIPPET_REPR.repr(cash)[:400],
                 "confidence": 0.99,
             }
         )
@@ -63,74 +97,97 @@ def build_citations(built: Dict[str, Any]) -> List[Dict[str, Any]]:
                 "file": "balance_sheet.json",
                 "kind": "json",
                 "where": nci.get("source_label") or nci.get("match_label") or "balance_sheet.json",
-                "snippet": str(nci)[:400],
+                "snippet": _SNIPPET_REPR.repr(nci)[:400],
                 "confidence": 0.95,
             }
         )
 
     # --- Instrument citations (debt + leases)
-    instruments = built.get("instruments") or []
-    if isinstance(instruments, list):
-        for idx, inst in enumerate(instruments, start=1):
-            if not isinstance(inst, dict):
-                continue
-
-            name = inst.get("instrument_name") or inst.get("name") or f"Instrument {idx}"
-            prov = inst.get("provenance") or {}
-            if not isinstance(prov, dict) or not prov:
-                continue
-
-            src = prov.get("source_file") or prov.get("file") or "unknown"
-            table_index = prov.get("table_index")
-            row_text = prov.get("row_text") or ""
-            html_snip = prov.get("html_snippet") or ""
-
-            where = []
-            if table_index is not None:
-                where.append(f"table_index={table_index}")
-            if prov.get("row_index") is not None:
-                where.append(f"row_index={prov.get('row_index')}")
-            where = ", ".join(where) if where else "—"
-
-            snippet = (html_snip or row_text or str(prov))[:400]
-
-            citations.append(
-                {
-                    "label": name,
-                    "file": src,
-                    "kind": "html" if str(src).endswith(".html") else "json",
-                    "where": where,
-                    "snippet": snippet,
-                    "confidence": prov.get("confidence", 0.75),
-                }
-            )
+    for idx, inst in enumerate(_dict_instruments(built), start=1):
+        name = inst.get("instrument_name") or inst.get("name") or f"Instrument {idx}"
+        prov = inst.get("provenance") or {}
+        if not isinstance(prov, dict) or not prov:
+            continue
+
+        src = prov.get("source_file") or prov.get("file") or "unknown"
+        table_index = prov.get("table_index")
+        row_text = prov.get("row_text") or ""
+        html_snip = prov.get("html_snippet") or ""
+
+        where = []
+        if table_index is not None:
+            where.append(f"table_index={table_index}")
+        if prov.get("row_index") is not None:
+            where.append(f"row_index={prov.get('row_index')}")
+        where = ", ".join(where) if where else "—"
+
+        snippet = (html_snip or row_text)[:400] or _SNIPPET_REPR.repr(prov)[:400]
+
+        citations.append(
+            {
+                "label": name,
+                "file": src,
+                "kind": "html" if str(src).endswith(".html") else "json",
+                "where": where,
+                "snippet": snippet,
+                "confidence": prov.get("confidence", 0.75),
+            }
+        )
 
     return citations
 
 
-def _sum_instrument_outstanding(built: Dict[str, Any]) -> float:
-    total = 0.0
-    instruments = built.get("instruments") or []
-    for inst in instruments:
-        if not isinstance(inst, dict):
-            continue
-        amt = _safe_float(inst.get("amount_outstanding_mm"))
-        if amt is None:
-            amt = _safe_float(inst.get("amount_outstanding"))  # just in case
-        if amt is None:
-            continue
-        total += amt
-    return total
+def _instrument_amount(inst: Dict[str, Any]) -> float:
+    amt = _safe_float(inst.get("amount_outstanding_mm"))
+    if amt is None:
+        amt = _safe_float(inst.get("amount_outstanding"))  # just in case
+    return np.nan if amt is None else amt
 
 
-def _find_value(built: Dict[str, Any], keys: List[str]) -> Optional[float]:
+def _find_value(built: Dict[str, Any], keys: Tuple[str, ...]) -> Optional[float]:
     for k in keys:
-        v = _safe_float(built.get(k))
+        raw = built.get(k)
+        if raw is None:
+            continue
+        # Builder output is already numeric; skip the try/except parse for that case
+        if isinstance(raw, (int, float)):
+            return float(raw)
+        v = _safe_float(raw)
         if v is not None:
             return v
     return None
 
 
+def _resolve_fields(built: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    return {name: _find_value(built, keys) for name, keys in _FIELD_KEYS.items()}
+
+
+def _nan_if_none(x: Optional[float]) -> float:
+    return np.nan if x is None else x
+
+
+# No fastmath: NaN marks missing values, and fastmath lets LLVM assume there are none.
+@njit(cache=True)
+def _assess_core(amounts, total_debt, cash, nci, market_cap, net_debt, ev):
+    """
+    Numeric core of the self-assessment (NaN = missing input).
+    Returns (delta_debt, delta_net, delta_ev, neg_count).
+    """
+    present = amounts[~np.isnan(amounts)]
+    sum_inst = present.sum()
+    neg_count = np.count_nonzero(present < -1e-6)
+    delta_debt = abs(total_debt - sum_inst)
+    delta_net = abs(net_debt - (total_debt - cash))
+    delta_ev = abs(ev - (net_debt + nci + market_cap))
+    return delta_debt, delta_net, delta_ev, neg_count
+
+
+def warm_up() -> None:
+    """Trigger compilation of _assess_core (a no-op cost without numba)."""
+    nan = np.nan
+    _assess_core(np.zeros(1, dtype=np.float64), 0.0, 0.0, nan, nan, 0.0, nan)
+
+
 def run_self_assessment(built: Dict[str, Any]) -> Dict[str, Any]:
     """
     Compute correctness checks + a score from built_capital_structure.json.
@@ -138,101 +195,102 @@ def run_self_assessment(built: Dict[str, Any]) -> Dict[str, Any]:
     """
     checks: List[Dict[str, Any]] = []
 
-    total_debt = _find_value(built, ["total_debt_mm", "total_debt"])
-    cash = _find_value(built, ["cash_and_cash_equivalents_mm", "cash_mm", "cash_and_cash_equivalents"])
-    nci = _find_value(built, ["noncontrolling_interests_mm", "nci_mm", "noncontrolling_interests"])
-    market_cap = _find_value(built, ["market_cap_mm", "market_cap"])
-    net_debt = _find_value(built, ["net_debt_mm", "net_debt"])
-    ev = _find_value(built, ["enterprise_value_mm", "enterprise_value"])
-
-    sum_inst = _sum_instrument_outstanding(built)
+    fields = _resolve_fields(built)
+    total_debt = fields["total_debt"]
+    cash = fields["cash"]
+    nci = fields["nci"]
+    market_cap = fields["market_cap"]
+    net_debt = fields["net_debt"]
+    ev = fields["ev"]
+
+    # One pass over instruments -> float64 array (NaN = missing); arithmetic runs in _assess_core
+    insts = _dict_instruments(built)
+    amounts = np.fromiter((_instrument_amount(i) for i in insts), dtype=np.float64, count=len(insts))
+    delta_debt, delta_net, delta_ev, neg_count = _assess_core(
+        amounts,
+        _nan_if_none(total_debt),
+        _nan_if_none(cash),
+        _nan_if_none(nci),
+        _nan_if_none(market_cap),
+        _nan_if_none(net_debt),
+        _nan_if_none(ev),
+    )
 
     def add_check(cid: str, status: str, message: str, **extra):
-        obj = {"id": cid, "status": status, "message": message}
-        obj.update(extra)
-        checks.append(obj)
+        if extra:
+            checks.append({"id": cid, "status": status, "message": message, **extra})
+        else:
+            checks.append({"id": cid, "status": status, "message": message})
 
     # --- Check: total debt vs sum of instruments
     if total_debt is not None:
-        delta = abs(total_debt - sum_inst)
+        delta = float(delta_debt)
         if delta <= 0.05:
-            add_check("arith_total_debt", "pass", f"Total Debt matches sum of instruments (Δ={_round2(delta)}).", delta=_round2(delta))
+            add_check("arith_total_debt", PASS, f"Total Debt matches sum of instruments (Δ={_round2(delta)}).", delta=_round2(delta))
         elif delta <= 0.5:
-            add_check("arith_total_debt", "warn", f"Total Debt slightly differs from sum of instruments (Δ={_round2(delta)}).", delta=_round2(delta))
+            add_check("arith_total_debt", WARN, f"Total Debt slightly differs from sum of instruments (Δ={_round2(delta)}).", delta=_round2(delta))
         else:
-            add_check("arith_total_debt", "fail", f"Total Debt differs from sum of instruments (Δ={_round2(delta)}).", delta=_round2(delta))
+            add_check("arith_total_debt", FAIL, f"Total Debt differs from sum of instruments (Δ={_round2(delta)}).", delta=_round2(delta))
     else:
-        add_check("arith_total_debt", "warn", "Total Debt not found in built output.")
+        add_check("arith_total_debt", WARN, "Total Debt not found in built output.")
 
     # --- Check: net debt
     if total_debt is not None and cash is not None and net_debt is not None:
-        expected = total_debt - cash
-        delta = abs(net_debt - expected)
+        delta = float(delta_net)
         if delta <= 0.05:
-            add_check("arith_net_debt", "pass", f"Net Debt matches Total Debt - Cash (Δ={_round2(delta)}).", delta=_round2(delta))
+            add_check("arith_net_debt", PASS, f"Net Debt matches Total Debt - Cash (Δ={_round2(delta)}).", delta=_round2(delta))
         elif delta <= 0.5:
-            add_check("arith_net_debt", "warn", f"Net Debt slightly differs (Δ={_round2(delta)}).", delta=_round2(delta))
+            add_check("arith_net_debt", WARN, f"Net Debt slightly differs (Δ={_round2(delta)}).", delta=_round2(delta))
         else:
-            add_check("arith_net_debt", "fail", f"Net Debt differs (Δ={_round2(delta)}).", delta=_round2(delta))
+            add_check("arith_net_debt", FAIL, f"Net Debt differs (Δ={_round2(delta)}).", delta=_round2(delta))
     else:
-        add_check("arith_net_debt", "warn", "Net Debt check skipped (missing Total Debt/Cash/Net Debt).")
+        add_check("arith_net_debt", WARN, "Net Debt check skipped (missing Total Debt/Cash/Net Debt).")
 
     # --- Check: enterprise value
     if ev is not None and net_debt is not None and nci is not None and market_cap is not None:
-        expected = net_debt + nci + market_cap
-        delta = abs(ev - expected)
+        delta = float(delta_ev)
         if delta <= 0.05:
-            add_check("arith_enterprise_value", "pass", f"EV matches Net Debt + NCI + Market Cap (Δ={_round2(delta)}).", delta=_round2(delta))
+            add_check("arith_enterprise_value", PASS, f"EV matches Net Debt + NCI + Market Cap (Δ={_round2(delta)}).", delta=_round2(delta))
         elif delta <= 0.5:
-            add_check("arith_enterprise_value", "warn", f"EV slightly differs (Δ={_round2(delta)}).", delta=_round2(delta))
+            add_check("arith_enterprise_value", WARN, f"EV slightly differs (Δ={_round2(delta)}).", delta=_round2(delta))
         else:
-            add_check("arith_enterprise_value", "fail", f"EV differs (Δ={_round2(delta)}).", delta=_round2(delta))
+            add_check("arith_enterprise_value", FAIL, f"EV differs (Δ={_round2(delta)}).", delta=_round2(delta))
     else:
-        add_check("arith_enterprise_value", "warn", "EV check skipped (missing EV/Net Debt/NCI/Market Cap).")
+        add_check("arith_enterprise_value", WARN, "EV check skipped (missing EV/Net Debt/NCI/Market Cap).")
 
     # --- Sanity checks on instruments
-    instruments = built.get("instruments") or []
-    missing_fields = 0
-    neg_amounts = 0
-    for inst in instruments:
-        if not isinstance(inst, dict):
-            continue
+    missing_fields = sum(1 for i in insts if not i.get("instrument_name") or i.get("priority") is None)
+    neg_amounts = int(neg_count)
+    for inst in insts:
         name = inst.get("instrument_name")
-        amt = _safe_float(inst.get("amount_outstanding_mm"))
-        priority = inst.get("priority")
         maturity = inst.get("maturity")
-        coupon = inst.get("coupon")
 
-        if not name or priority is None:
-            missing_fields += 1
-        if amt is not None and amt < -1e-6:
-            neg_amounts += 1
         # maturity sanity (if numeric)
         try:
             if maturity not in (None, "", "—"):
                 y = int(str(maturity))
                 if y < 1990 or y > 2100:
-                    add_check("sanity_maturity", "warn", f"Suspicious maturity year: {y} for {name}.")
+                    add_check("sanity_maturity", WARN, f"Suspicious maturity year: {y} for {name}.")
                     break
         except Exception:
             pass
 
     if missing_fields == 0:
-        add_check("completeness", "pass", "All instruments have basic required fields (name/priority).")
+        add_check("completeness", PASS, "All instruments have basic required fields (name/priority).")
     else:
-        add_check("completeness", "warn", f"{missing_fields} instrument(s) missing name/priority.")
+        add_check("completeness", WARN, f"{missing_fields} instrument(s) missing name/priority.")
 
     if neg_amounts == 0:
-        add_check("sanity_negative_amounts", "pass", "No negative outstanding amounts detected.")
+        add_check("sanity_negative_amounts", PASS, "No negative outstanding amounts detected.")
     else:
-        add_check("sanity_negative_amounts", "fail", f"{neg_amounts} instrument(s) have negative outstanding amounts.")
+        add_check("sanity_negative_amounts", FAIL, f"{neg_amounts} instrument(s) have negative outstanding amounts.")
 
     # --- Score
     score = 100
     for c in checks:
-        if c["status"] == "fail":
+        if c["status"] == FAIL:
             score -= 20
-        elif c["status"] == "warn":
+        elif c["status"] == WARN:
             score -= 5
     score = max(0, min(100, score))
 
@@ -207,21 +207,43 @@
 
 from __future__ import annotations
 
-import json
-import os
+import hashlib
+import importlib
 import shutil
-import subprocess
 import threading
 import time
 import uuid
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+import orjson
+from cachetools import LRUCache
 
 from .settings import MAX_CONCURRENT_JOBS, STORAGE_DIR
 
 
+@lru_cache(maxsize=2)
+def _load_html_cached(path_str: str, mtime_ns: int) -> str:
+    """
+    Rendered HTML keyed by (path, mtime_ns). Every job has its own output path, so only
+    repeat polls of the same job with include_html can hit; two entries cover a client
+    polling one job while another finishes, without pinning whole documents per job.
+    """
+    return Path(path_str).read_text(encoding="utf-8")
+
+
+# read_result payloads kept in memory for the most recently finished/polled jobs only;
+# older jobs are re-read from built_capital_structure.json on demand
+RESULT_CACHE_SIZE = 8
+
+# input_key -> succeeded job id, for reusing identical runs; only recent runs are worth matching
+REUSE_INDEX_SIZE = 256
+
+
 @dataclass
 class Job:
     id: str
@@ -243,6 +265,12 @@ class Job:
     # artifacts
     html_path: Optional[Path] = None
     built_json_path: Optional[Path] = None
+    # set once when the artifacts are written, so polling/download paths don't stat() them
+    html_ready: bool = False
+    json_ready: bool = False
+
+    # content hash of inputs + market cap/period, used to reuse identical runs
+    input_key: Optional[str] = None
 
 
 class JobManager:
@@ -252,7 +280,17 @@ class JobManager:
         self.parsers_dir = parsers_dir
         self._jobs: Dict[str, Job] = {}
         self._lock = threading.Lock()
-        self._sema = threading.Semaphore(MAX_CONCURRENT_JOBS)
+        self._results_by_key: LRUCache = LRUCache(maxsize=REUSE_INDEX_SIZE)  # input_key -> succeeded job id
+        self._result_cache: LRUCache = LRUCache(maxsize=RESULT_CACHE_SIZE)  # job id -> read_result payload
+        self._pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix="job")
+        # shared pool for overlapping artifact writes (avoids a thread spawn per job)
+        self._io_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix="job-io")
+
+        # Parsers import each other as top-level modules, so their directory must be on sys.path
+        if str(parsers_dir) not in sys.path:
+            sys.path.insert(0, str(parsers_dir))
+        self._builder = importlib.import_module("capital_structure_builder")
+        self._renderer = importlib.import_module("html_renderer")
 
     def create_job(self) -> Job:
         job_id = uuid.uuid4().hex
@@ -278,6 +316,10 @@ class JobManager:
             self._jobs[job_id] = job
         return job
 
+    def warm_up(self) -> None:
+        """Exercise the renderer once so first-job latency excludes one-time setup."""
+        self._renderer.render({"issuer_groups": [], "notes": []})
+
     def get_job(self, job_id: str) -> Optional[Job]:
         with self._lock:
             return self._jobs.get(job_id)
@@ -286,6 +328,11 @@ class JobManager:
         job = self.get_job(job_id)
         if not job:
             return
+        with self._lock:
+            self._result_cache.pop(job_id, None)
+            if job.input_key and self._results_by_key.get(job.input_key) == job_id:
+                del self._results_by_key[job.input_key]
+        job.html_ready = job.json_ready = False
         try:
             shutil.rmtree(job.job_dir, ignore_errors=True)
         except Exception:
@@ -300,6 +347,45 @@ class JobManager:
             j.updated_at = time.time()
             j.error = error
 
+    @staticmethod
+    def _input_key(
+        inputs: List[Path],
+        market_cap_mm: float,
+        period_end_text: Optional[str],
+        market_cap_meta: Optional[dict],
+    ) -> str:
+        h = hashlib.sha256()
+        for p in inputs:
+            with p.open("rb") as f:
+                h.update(hashlib.file_digest(f, "sha256").digest())
+        # the market cap note appended to the HTML depends on source/as_of, so they are part of the key
+        meta = market_cap_meta or {}
+        h.update(f"{market_cap_mm!r}|{period_end_text or ''}|{meta.get('source')}|{meta.get('as_of_utc')}".encode())
+        return h.hexdigest()
+
+    def _reuse_result(self, job: Job, key: str, built_json: Path, out_html: Path) -> bool:
+        """Copy artifacts of a prior succeeded job with the same input key, if any."""
+        with self._lock:
+            prior_id = self._results_by_key.get(key)
+            prior = self._jobs.get(prior_id) if prior_id else None
+        if not prior or prior.status != "succeeded" or not (prior.html_ready and prior.json_ready):
+            return False
+
+        try:
+            shutil.copyfile(prior.built_json_path, built_json)
+            shutil.copyfile(prior.html_path, out_html)
+        except OSError:
+            # prior job files removed concurrently -> just run the pipeline
+            return False
+        job.built_json_path = built_json
+        job.html_path = out_html
+        job.json_ready = job.html_ready = True
+        with self._lock:
+            prior_result = self._result_cache.get(prior.id)
+            if prior_result is not None:
+                self._result_cache[job.id] = self._result_payload(job, prior_result["built"])
+        return True
+
     def _run_pipeline(
         self,
         job_id: str,
@@ -308,7 +394,7 @@ class JobManager:
         ticker: Optional[str] = None,
         market_cap_meta: Optional[dict] = None,
     ) -> None:
-        """Run your existing CLI scripts as subprocesses."""
+        """Run the builder + renderer in-process and persist both artifacts."""
 
         job = self.get_job(job_id)
         if not job:
@@ -329,66 +415,34 @@ class JobManager:
         built_json = job.output_dir / "built_capital_structure.json"
         out_html = job.output_dir / "generated.html"
 
-        builder = self.parsers_dir / "capital_structure_builder.py"
-        renderer = self.parsers_dir / "html_renderer.py"
-
-        # Use the same Python interpreter running the API (important for conda env)
-        python_bin = sys.executable
-
-        cmd_build = [
-            python_bin,
-            str(builder),
-            "--balance",
-            str(bal),
-            "--debt",
-            str(debt),
-            "--lease",
-            str(lease),
-            "--metadata",
-            str(meta),
-            "--market-cap-mm",
-            str(market_cap_mm),
-            "--out",
-            str(built_json),
-        ]
-        if period_end_text:
-            cmd_build.extend(["--period-end", period_end_text])
-
-        cmd_render = [
-            python_bin,
-            str(renderer),
-            str(built_json),
-            "--out",
-            str(out_html),
-        ]
-
-        env = dict(os.environ)
-        env["PYTHONPATH"] = str(self.parsers_dir) + (
-            ":" + env.get("PYTHONPATH", "") if env.get("PYTHONPATH") else ""
-        )
-
         try:
-            proc1 = subprocess.run(cmd_build, capture_output=True, text=True, env=env)
-            if proc1.returncode != 0:
-                raise RuntimeError(
-                    "capital_structure_builder.py failed\n"
-                    f"STDOUT:\n{proc1.stdout}\n\nSTDERR:\n{proc1.stderr}"
-                )
+            key = self._input_key([bal, debt, lease, meta], market_cap_mm, period_end_text, market_cap_meta)
+            job.input_key = key
+            if self._reuse_result(job, key, built_json, out_html):
+                self._set_status(job_id, "succeeded")
+                return
 
-            proc2 = subprocess.run(cmd_render, capture_output=True, text=True, env=env)
-            if proc2.returncode != 0:
-                raise RuntimeError(
-                    "html_renderer.py failed\n"
-                    f"STDOUT:\n{proc2.stdout}\n\nSTDERR:\n{proc2.stderr}"
+            try:
+                built = self._builder.build_capital_structure(
+                    balance_path=str(bal),
+                    debt_path=str(debt),
+                    lease_path=str(lease),
+                    metadata_path=str(meta),
+                    market_cap_mm=market_cap_mm,
+                    period_end_text=period_end_text,
                 )
+            except Exception as e:
+                raise RuntimeError(f"capital_structure_builder failed: {e}") from e
 
-            job.html_path = out_html
-            job.built_json_path = built_json
+            try:
+                html = self._renderer.render(built)
+            except Exception as e:
+                raise RuntimeError(f"html_renderer failed: {e}") from e
 
             # Optional: append market cap note to HTML for bonus-point visibility
             if market_cap_meta:
                 try:
-                    note = (
+                    html += (
                         "\n<!-- Market Cap (auto-fetched) -->\n"
                         '<div style="margin-top:12px;font-size:12px;color:#555;">'
                         f"<b>Market Cap (auto-fetched):</b> {market_cap_mm:.3f} $mm<br/>"
@@ -396,13 +450,24 @@ class JobManager:
                         f"<b>As of (UTC):</b> {market_cap_meta.get('as_of_utc')}"
                         "</div>\n"
                     )
-                    html = out_html.read_text(encoding="utf-8")
-                    out_html.write_text(html + note, encoding="utf-8")
                 except Exception:
                     # Do not fail job if note append fails
                     pass
 
+            # Overlap the two artifact writes: JSON on the I/O pool, HTML on this worker
+            json_write = self._io_pool.submit(built_json.write_bytes, orjson.dumps(built, option=orjson.OPT_INDENT_2))
+            out_html.write_text(html, encoding="utf-8")
+            json_write.result()
+
+            job.html_path = out_html
+            job.built_json_path = built_json
+            job.json_ready = job.html_ready = True
+            with self._lock:
+                self._result_cache[job_id] = self._result_payload(job, built)
+
             self._set_status(job_id, "succeeded")
+            with self._lock:
+                self._results_by_key[key] = job_id
 
         except Exception as e:
             self._set_status(job_id, "failed", error=str(e))
@@ -414,40 +479,65 @@ class JobManager:
         period_end_text: Optional[str] = None,
         ticker: Optional[str] = None,
         market_cap_meta: Optional[dict] = None,
-    ) -> None:
-        """Starts job in a background thread, respecting max concurrency."""
+    ) -> Future:
+        """Queues job on the worker pool (bounded by MAX_CONCURRENT_JOBS)."""
+        return self._pool.submit(
+            self._run_pipeline,
+            job_id=job_id,
+            market_cap_mm=market_cap_mm,
+            period_end_text=period_end_text,
+            ticker=ticker,
+            market_cap_meta=market_cap_meta,
+        )
 
-        def runner() -> None:
-            with self._sema:
-                self._run_pipeline(
-                    job_id=job_id,
-                    market_cap_mm=market_cap_mm,
-                    period_end_text=period_end_text,
-                    ticker=ticker,
-                    market_cap_meta=market_cap_meta,
-                )
+    def shutdown(self) -> None:
+        """Cancel queued work and drop files of jobs that never finished."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._io_pool.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            unfinished = [j.id for j in self._jobs.values() if j.status in ("queued", "running")]
+        for job_id in unfinished:
+            self.delete_job_files(job_id)
 
-        t = threading.Thread(target=runner, daemon=True)
-        t.start()
+    def read_result(self, job_id: str, include_html: bool = False) -> Dict[str, Any]:
+        """Result payload for a succeeded job.
 
-    def read_result(self, job_id: str) -> Dict[str, Any]:
+        The rendered HTML is served by /download/html (see html_url); it is only
+        read into the payload when include_html is set.
+        """
         job = self.get_job(job_id)
         if not job:
             raise KeyError("job not found")
         if job.status != "succeeded":
             raise RuntimeError(f"job not succeeded (status={job.status})")
 
-        html = job.html_path.read_text(encoding="utf-8") if job.html_path and job.html_path.exists() else ""
-        built = {}
-        if job.built_json_path and job.built_json_path.exists():
-            built = json.loads(job.built_json_path.read_text(encoding="utf-8"))
-
+        with self._lock:
+            result = self._result_cache.get(job_id)
+        if result is None:
+            built = {}
+            if job.json_ready:
+                p = job.built_json_path
+                built = orjson.loads(p.read_bytes())
+            result = self._result_payload(job, built)
+            with self._lock:
+                self._result_cache[job_id] = result
+
+        if not include_html:
+            return result
+
+        html = ""
+        if job.html_ready:
+            p = job.html_path
+            html = _load_html_cached(str(p), p.stat().st_mtime_ns)
+        return {**result, "html": html}
+
+    @staticmethod
+    def _result_payload(job: Job, built: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "job_id": job.id,
-            "html": html,
             "built": built,
+            "html_url": f"/api/jobs/{job.id}/download/html",
             "ticker": job.ticker,
             "market_cap_mm": job.market_cap_mm,
             "market_cap_meta": job.market_cap_meta,
         }
-
@@ -1,18 +1,29 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import mimetypes
+import os
+import shutil
+import stat
 from pathlib import Path
-from typing import Optional
+from typing import IO, Optional
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+import orjson
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.staticfiles import NotModifiedResponse
 
 from .jobs import JobManager
 from .market_cap import get_market_cap_mm_yfinance
 from .settings import CORS_ALLOW_ORIGINS, MAX_UPLOAD_BYTES, STORAGE_DIR
-from .bonus import build_citations, run_self_assessment
+from .bonus import build_citations, run_self_assessment, warm_up as warm_up_bonus
 
 # Parsers live in backend/parsers
 PARSERS_DIR = Path(__file__).resolve().parents[1] / "parsers"
@@ -21,40 +32,86 @@ app = FastAPI(title="Capital Structure Extractor", version="1.0.0")
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=CORS_ALLOW_ORIGINS if CORS_ALLOW_ORIGINS != ["*"] else ["*"],
+    allow_origins=CORS_ALLOW_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 jm = JobManager(parsers_dir=PARSERS_DIR)
 
 
+@app.on_event("startup")
+def _init_storage() -> None:
+    # Once per worker start rather than on every import of this module
+    STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+
+
+@app.on_event("startup")
+def _warm_up() -> None:
+    # Parser modules are imported by JobManager; this covers first-call setup (and numba compile)
+    try:
+        jm.warm_up()
+        warm_up_bonus()
+    except Exception:
+        # never block startup on a warm-up failure
+        pass
+
+
+@app.on_event("shutdown")
+def _shutdown_jobs() -> None:
+    jm.shutdown()
+
+
 @app.get("/api/health")
 def health():
     return {"ok": True}
 
 
+def _upload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Upload too large (>{MAX_UPLOAD_BYTES} bytes)",
+    )
+
+
+class _LimitedReader:
+    """Read-through wrapper that raises 413 once more than MAX_UPLOAD_BYTES are read."""
+
+    def __init__(self, raw: IO[bytes]):
+        self._raw = raw
+        self._total = 0
+
+    def read(self, n: int = -1) -> bytes:
+        chunk = self._raw.read(n)
+        self._total += len(chunk)
+        if self._total > MAX_UPLOAD_BYTES:
+            raise _upload_too_large()
+        return chunk
+
+
 def _save_upload(upload: UploadFile, dest: Path) -> None:
     dest.parent.mkdir(parents=True, exist_ok=True)
 
-    total = 0
+    # Starlette records the size when it spools the multipart body; only count bytes when it's unknown
+    if upload.size is not None:
+        if upload.size > MAX_UPLOAD_BYTES:
+            raise _upload_too_large()
+        src: IO[bytes] = upload.file
+    else:
+        src = _LimitedReader(upload.file)
+
     with dest.open("wb") as f:
-        while True:
-            chunk = upload.file.read(1024 * 1024)  # 1MB
-            if not chunk:
-                break
-            total += len(chunk)
-            if total > MAX_UPLOAD_BYTES:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"Upload too large (>{MAX_UPLOAD_BYTES} bytes)",
-                )
-            f.write(chunk)
+        shutil.copyfileobj(src, f, 1024 * 1024)  # 1MB
+
+
+def _parse_json_file(path: Path) -> None:
+    orjson.loads(path.read_bytes())
 
 
 @app.post("/api/jobs")
-def create_job(
+async def create_job(
     balance_sheet: UploadFile = File(..., description="balance_sheet.json"),
     debt_note: UploadFile = File(..., description="debt_note.html"),
     lease_note: UploadFile = File(..., description="lease_note.html"),
@@ -71,14 +128,22 @@ def create_job(
     # Save uploads
     # -------------------------
     try:
-        _save_upload(balance_sheet, job.input_dir / "balance_sheet.json")
-        _save_upload(debt_note, job.input_dir / "debt_note.html")
-        _save_upload(lease_note, job.input_dir / "lease_note.html")
-        _save_upload(metadata, job.input_dir / "metadata.json")
+        # Blocking file IO runs in the threadpool; the four saves overlap.
+        # Wait for all of them before raising so cleanup never races a writer.
+        results = await asyncio.gather(
+            run_in_threadpool(_save_upload, balance_sheet, job.input_dir / "balance_sheet.json"),
+            run_in_threadpool(_save_upload, debt_note, job.input_dir / "debt_note.html"),
+            run_in_threadpool(_save_upload, lease_note, job.input_dir / "lease_note.html"),
+            run_in_threadpool(_save_upload, metadata, job.input_dir / "metadata.json"),
+            return_exceptions=True,
+        )
+        for r in results:
+            if isinstance(r, BaseException):
+                raise r
 
         # metadata must be JSON
         try:
-            json.loads((job.input_dir / "metadata.json").read_text(encoding="utf-8"))
+            await run_in_threadpool(_parse_json_file, job.input_dir / "metadata.json")
         except Exception:
             raise HTTPException(status_code=400, detail="metadata.json is not valid JSON")
 
@@ -101,7 +166,7 @@ def create_job(
     if resolved_market_cap_mm is None and norm_ticker:
         res = None
         try:
-            res = get_market_cap_mm_yfinance(norm_ticker)
+            res = await run_in_threadpool(get_market_cap_mm_yfinance, norm_ticker)
         except Exception:
             # absolutely never allow this to become a 500
             res = None
@@ -170,7 +235,7 @@ def get_job(job_id: str):
 
 
 @app.get("/api/jobs/{job_id}/result")
-def get_result(job_id: str):
+def get_result(job_id: str, include_html: bool = False):
     job = jm.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="job not found")
@@ -182,7 +247,7 @@ def get_result(job_id: str):
         raise HTTPException(status_code=409, detail=f"job not ready (status={job.status})")
 
     try:
-        return JSONResponse(jm.read_result(job_id))
+        return JSONResponse(jm.read_result(job_id, include_html=include_html))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -193,7 +258,7 @@ def download_html(job_id: str):
     if not job:
         raise HTTPException(status_code=404, detail="job not found")
 
-    if job.status != "succeeded" or not job.html_path or not job.html_path.exists():
+    if job.status != "succeeded" or not job.html_ready:
         raise HTTPException(status_code=409, detail="html not available")
 
     return FileResponse(path=str(job.html_path), filename=f"{job_id}.html", media_type="text/html")
@@ -226,7 +291,7 @@ def download_json(job_id: str):
     if not job:
         raise HTTPException(status_code=404, detail="job not found")
 
-    if job.status != "succeeded" or not job.built_json_path or not job.built_json_path.exists():
+    if job.status != "succeeded" or not job.json_ready:
         raise HTTPException(status_code=409, detail="json not available")
 
     return FileResponse(path=str(job.built_json_path), filename=f"{job_id}.json", media_type="application/json")
@@ -237,28 +302,74 @@ def download_json(job_id: str):
 # ===============================
 FRONTEND_DIST = Path(__file__).resolve().parents[1] / "frontend" / "dist"
 
-if FRONTEND_DIST.exists():
-    assets_dir = FRONTEND_DIST / "assets"
-    if assets_dir.exists():
-        app.mount("/assets", StaticFiles(directory=str(assets_dir)), name="assets")
 
-    @app.get("/", include_in_schema=False)
-    def frontend_root():
-        return FileResponse(str(FRONTEND_DIST / "index.html"))
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves a build-time `<file>.gz` sibling when the client accepts gzip,
+    and stamps Cache-Control: `cache_control` on files, `no-cache` on HTML.
+    """
+
+    def __init__(self, *args, cache_control: Optional[str] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        response = None
+        if "gzip" in request_headers.get("accept-encoding", ""):
+            gz_path = f"{full_path}.gz"
+            try:
+                gz_stat = os.stat(gz_path)
+            except OSError:
+                gz_stat = None
+            if gz_stat is not None and stat.S_ISREG(gz_stat.st_mode):
+                response = FileResponse(
+                    gz_path,
+                    status_code=status_code,
+                    stat_result=gz_stat,
+                    media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+                    headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+                )
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
 
-    @app.get("/{full_path:path}", include_in_schema=False)
-    def spa_fallback(full_path: str):
-        if full_path.startswith(("api", "docs", "openapi.json")):
-            raise HTTPException(status_code=404, detail="Not Found")
+        # index.html must be revalidated so a deploy is picked up immediately
+        cache_control = "no-cache" if str(full_path).endswith(".html") else self.cache_control
+        if cache_control:
+            response.headers["Cache-Control"] = cache_control
 
-        file_path = FRONTEND_DIST / full_path
-        if file_path.exists() and file_path.is_file():
-            return FileResponse(str(file_path))
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
 
-        return FileResponse(str(FRONTEND_DIST / "index.html"))
 
+if FRONTEND_DIST.exists():
+    assets_dir = FRONTEND_DIST / "assets"
+    if assets_dir.exists():
+        # Vite content-hashes asset filenames, so they can be cached forever
+        app.mount(
+            "/assets",
+            PrecompressedStaticFiles(directory=str(assets_dir), cache_control="public, max-age=31536000, immutable"),
+            name="assets",
+        )
 
-STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+    # Mounted last: Starlette serves real files (and "/" -> index.html) directly.
+    app.mount("/", PrecompressedStaticFiles(directory=str(FRONTEND_DIST), html=True), name="spa")
+
+    # index.html is small and only changes on deploy; keep it in memory for SPA-route misses
+    INDEX_HTML = (FRONTEND_DIST / "index.html").read_bytes()
+
+    @app.exception_handler(StarletteHTTPException)
+    async def spa_fallback(request: Request, exc: StarletteHTTPException):
+        # Unknown client-side routes get index.html; API 404s keep their JSON body
+        path = request.url.path.lstrip("/")
+        if (
+            exc.status_code != 404
+            or request.method not in ("GET", "HEAD")
+            or path.startswith(("api", "docs", "openapi.json", "assets/"))
+        ):
+            return await http_exception_handler(request, exc)
+        return Response(INDEX_HTML, media_type="text/html", headers={"Cache-Control": "no-cache"})
 
 
 
@@ -2,12 +2,24 @@
 from __future__ import annotations
 
 import os
-import json
-from dataclasses import dataclass
+import random
+import sqlite3
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from threading import RLock
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 
+import orjson
 import requests
+from cachetools import TLRUCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .settings import STORAGE_DIR
 
 # yfinance is optional; we only import if fallback is enabled.
 # (Railway/Yahoo often blocks, so default is disabled.)
@@ -17,6 +29,26 @@ except Exception:
     yf = None  # type: ignore
 
 
+# One pooled session for all outbound lookups: keep-alive + TLS reuse across calls.
+_HTTP = requests.Session()
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    # Transient 5xx only, with short backoff: a 429 is not retried against the quota, and a
+    # server's Retry-After (possibly minutes) must never hold an /api/jobs request open
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.2,
+        status_forcelist=(500, 502, 503, 504),
+        respect_retry_after_header=False,
+    ),
+)
+_HTTP.mount("http://", _HTTP_ADAPTER)
+_HTTP.mount("https://", _HTTP_ADAPTER)
+_HTTP_HEADERS = MappingProxyType({"User-Agent": "capital-structure-app/1.0", "Accept": "application/json"})
+_HTTP.headers.update(_HTTP_HEADERS)
+
+
 @dataclass
 class MarketCapResult:
     market_cap_mm: float
@@ -26,8 +58,137 @@ class MarketCapResult:
     details: str
 
 
+# In-process caches keyed by uppercased ticker: repeat submissions skip the
+# network round-trip. Bounded, and locked because handlers run on a threadpool.
+# Entries are (fresh_until, result): fresh for ~CACHE_TTL_SECONDS (jittered by
+# +/-CACHE_TTL_JITTER so a batch filled together doesn't expire together), then
+# served stale for up to STALE_TTL_SECONDS while a background refresh runs.
+# Misses are remembered briefly so unknown symbols don't hammer FMP.
+CACHE_TTL_SECONDS = 60
+STALE_TTL_SECONDS = CACHE_TTL_SECONDS * 4
+NEGATIVE_CACHE_TTL_SECONDS = 15
+CACHE_TTL_JITTER = 0.2
+CACHE_MAXSIZE = 4096
+
+
+def _jittered(ttl: float) -> float:
+    return ttl * random.uniform(1.0 - CACHE_TTL_JITTER, 1.0 + CACHE_TTL_JITTER)
+
+
+_CACHE: TLRUCache = TLRUCache(
+    maxsize=CACHE_MAXSIZE,
+    ttu=lambda _key, entry, _now: entry[0] + (STALE_TTL_SECONDS - CACHE_TTL_SECONDS),
+    timer=time.time,
+)
+_NEG_CACHE: TLRUCache = TLRUCache(
+    maxsize=CACHE_MAXSIZE,
+    ttu=lambda _key, _value, now: now + _jittered(NEGATIVE_CACHE_TTL_SECONDS),
+)
+_LOCK = RLock()
+
+# Lookups currently on the wire, so concurrent misses for a ticker coalesce.
+INFLIGHT_WAIT_SECONDS = 15
+_INFLIGHT: Dict[str, Future] = {}
+
+# Background refreshes of stale entries (stale-while-revalidate)
+_REFRESH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="market-cap-refresh")
+
+
+# Successful lookups are also persisted to SQLite under STORAGE_DIR so a restart
+# or redeploy starts warm instead of re-fetching every ticker from FMP.
+# Rows follow the same fresh/stale windows as the in-memory cache.
+DISK_CACHE_PATH = STORAGE_DIR / "market_cap_cache.sqlite3"
+_DISK: Optional[sqlite3.Connection] = None
+_DISK_DISABLED = False
+
+
+def _disk() -> Optional[sqlite3.Connection]:
+    """Lazily open the disk cache (caller holds _LOCK). Any failure disables it for the process."""
+    global _DISK, _DISK_DISABLED
+    if _DISK is not None or _DISK_DISABLED:
+        return _DISK
+    try:
+        DISK_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(DISK_CACHE_PATH), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS market_cap ("
+            "symbol TEXT PRIMARY KEY, fetched_at REAL NOT NULL, payload BLOB NOT NULL)"
+        )
+        conn.execute("DELETE FROM market_cap WHERE fetched_at < ?", (time.time() - STALE_TTL_SECONDS,))
+        _DISK = conn
+    except (sqlite3.Error, OSError):
+        _DISK_DISABLED = True
+    return _DISK
+
+
+def _disk_get(symbol: str) -> Optional[Tuple[float, MarketCapResult]]:
+    conn = _disk()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute("SELECT fetched_at, payload FROM market_cap WHERE symbol = ?", (symbol,)).fetchone()
+        if row is None or time.time() - row[0] >= STALE_TTL_SECONDS:
+            return None
+        return row[0] + CACHE_TTL_SECONDS, MarketCapResult(**orjson.loads(row[1]))
+    except (sqlite3.Error, orjson.JSONDecodeError, TypeError):
+        return None
+
+
+def _disk_set(symbol: str, res: MarketCapResult) -> None:
+    conn = _disk()
+    if conn is None:
+        return
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO market_cap (symbol, fetched_at, payload) VALUES (?, ?, ?)",
+            (symbol, time.time(), orjson.dumps(asdict(res))),
+        )
+    except sqlite3.Error:
+        pass
+
+
+def _cache_get(symbol: str, allow_stale: bool = True) -> Tuple[bool, Optional[MarketCapResult]]:
+    """
+    (hit, result); a hit with result None is a cached failed lookup.
+    With allow_stale, an expired-but-recent entry is returned immediately and a
+    background refresh is scheduled (unless one is running or just failed).
+    """
+    with _LOCK:
+        entry = _CACHE.get(symbol)
+        if entry is None:
+            entry = _disk_get(symbol)
+            if entry is not None:
+                _CACHE[symbol] = entry
+        if entry is not None:
+            fresh_until, res = entry
+            if time.time() < fresh_until:
+                return True, res
+            if allow_stale:
+                if symbol not in _NEG_CACHE and symbol not in _INFLIGHT:
+                    _REFRESH_POOL.submit(_fetch_coalesced, symbol)
+                return True, res
+        return symbol in _NEG_CACHE, None
+
+
+def _cache_set(symbol: str, res: Optional[MarketCapResult]) -> None:
+    with _LOCK:
+        if res is None:
+            _NEG_CACHE[symbol] = True
+        else:
+            _NEG_CACHE.pop(symbol, None)
+            _CACHE[symbol] = (time.time() + _jittered(CACHE_TTL_SECONDS), res)
+            _disk_set(symbol, res)
+
+
+@lru_cache(maxsize=4)
+def _iso_at(sec: int) -> str:
+    return datetime.fromtimestamp(sec, tz=timezone.utc).isoformat()
+
+
 def _now_utc_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    # Second resolution is all as_of_utc needs; results built in the same second share one string
+    return _iso_at(int(time.time()))
 
 
 def _env_bool(name: str, default: bool = False) -> bool:
@@ -39,6 +200,11 @@ def _env_bool(name: str, default: bool = False) -> bool:
     return default
 
 
+# Read once at import: env vars don't change for the life of the process.
+ALLOW_YFINANCE_FALLBACK = _env_bool("ALLOW_YFINANCE_FALLBACK", default=False)
+FMP_API_KEY = (os.getenv("FMP_API_KEY") or "").strip()
+
+
 def _safe_float(x: Any) -> Optional[float]:
     try:
         if x is None:
@@ -48,52 +214,74 @@ def _safe_float(x: Any) -> Optional[float]:
         return None
 
 
-def _fetch_fmp_stable_profile(ticker: str) -> Optional[Dict[str, Any]]:
-    """
-    Calls:
-      https://financialmodelingprep.com/stable/profile?symbol=AAP&apikey=...
-    Returns first object dict or None.
-    """
-    api_key = (os.getenv("FMP_API_KEY") or "").strip()
-    if not api_key:
-        return None
+_FMP_STABLE_URL = "https://financialmodelingprep.com/stable/profile"
+
+# FMP accepts comma-separated symbols on stable/profile; cap the URL size per call.
+FMP_BATCH_SIZE = 100
 
-    symbol = (ticker or "").strip().upper()
-    if not symbol:
-        return None
 
-    url = "https://financialmodelingprep.com/stable/profile"
-    params = {"symbol": symbol, "apikey": api_key}
+def _fetch_fmp_profile_rows(symbols: List[str], api_key: str) -> Optional[List[Any]]:
+    """One stable/profile call for up to FMP_BATCH_SIZE symbols. Returns the JSON list or None."""
+    params = {"symbol": ",".join(symbols), "apikey": api_key}
 
     try:
-        r = requests.get(url, params=params, timeout=12)
+        r = _HTTP.get(_FMP_STABLE_URL, params=params, timeout=(3, 10))
         if r.status_code != 200:
             # Don't raise -> don't crash the app
             return None
 
-        data = r.json()
-        if not isinstance(data, list) or not data:
-            return None
-
-        obj = data[0]
-        if not isinstance(obj, dict):
+        data = orjson.loads(r.content)
+        if not isinstance(data, list):
             return None
-
-        return obj
+        return data
     except Exception:
         return None
 
 
-def get_market_cap_mm_fmp(ticker: str) -> Optional[MarketCapResult]:
+def _fetch_fmp_profiles_batch(symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
     """
-    FMP Stable (recommended on cloud):
-      - Uses stable/profile and reads marketCap (or mktCap if present)
-      - Returns MarketCapResult in MILLIONS, or None
+    Calls (one request per FMP_BATCH_SIZE symbols):
+      https://financialmodelingprep.com/stable/profile?symbol=AAP,MSFT&apikey=...
+    Returns {UPPERCASED_SYMBOL: profile dict} for the symbols FMP returned.
     """
-    obj = _fetch_fmp_stable_profile(ticker)
-    if not obj:
-        return None
-
+    api_key = FMP_API_KEY
+    if not api_key:
+        return {}
+
+    wanted = list(dict.fromkeys(s for s in ((t or "").strip().upper() for t in symbols) if s))
+    out: Dict[str, Dict[str, Any]] = {}
+
+    for i in range(0, len(wanted), FMP_BATCH_SIZE):
+        chunk = wanted[i : i + FMP_BATCH_SIZE]
+        rows = _fetch_fmp_profile_rows(chunk, api_key)
+        if len(chunk) == 1:
+            _take_single_profile(out, chunk[0], rows)
+            continue
+        if rows is None:
+            # Multi-symbol profile is plan-dependent on FMP; fall back to one call per symbol.
+            for s in chunk:
+                _take_single_profile(out, s, _fetch_fmp_profile_rows([s], api_key))
+            continue
+        # Several symbols in one answer: demultiplex by the symbol FMP echoes back
+        for obj in rows:
+            if not isinstance(obj, dict):
+                continue
+            sym = str(obj.get("symbol") or "").strip().upper()
+            if sym in chunk and sym not in out:
+                out[sym] = obj
+
+    return out
+
+
+def _take_single_profile(out: Dict[str, Dict[str, Any]], symbol: str, rows: Optional[List[Any]]) -> None:
+    # A single-symbol request answers for that symbol whatever form FMP echoes (e.g. BRK.B -> BRK-B)
+    for obj in rows or []:
+        if isinstance(obj, dict):
+            out[symbol] = obj
+            return
+
+
+def _fmp_result_from_profile(obj: Dict[str, Any], as_of_utc: str) -> Optional[MarketCapResult]:
     # FMP stable typically uses "marketCap"
     raw = obj.get("marketCap", None)
     if raw is None:
@@ -109,11 +297,39 @@ def get_market_cap_mm_fmp(ticker: str) -> Optional[MarketCapResult]:
         market_cap_mm=mc / 1_000_000.0,
         source="fmp_stable_profile",
         currency=currency,
-        as_of_utc=_now_utc_iso(),
+        as_of_utc=as_of_utc,
         details="stable/profile: marketCap",
     )
 
 
+def get_market_caps_mm_fmp(tickers: Iterable[str]) -> Dict[str, MarketCapResult]:
+    """
+    Batch FMP Stable lookup: one stable/profile request per FMP_BATCH_SIZE tickers.
+    Returns {UPPERCASED_TICKER: MarketCapResult}; tickers without a usable
+    marketCap are omitted. Never raises.
+    """
+    profiles = _fetch_fmp_profiles_batch(tickers)
+    as_of = _now_utc_iso()
+    out: Dict[str, MarketCapResult] = {}
+    for sym, obj in profiles.items():
+        res = _fmp_result_from_profile(obj, as_of)
+        if res is not None:
+            out[sym] = res
+    return out
+
+
+def get_market_cap_mm_fmp(ticker: str) -> Optional[MarketCapResult]:
+    """
+    FMP Stable (recommended on cloud):
+      - Uses stable/profile and reads marketCap (or mktCap if present)
+      - Returns MarketCapResult in MILLIONS, or None
+    """
+    symbol = (ticker or "").strip().upper()
+    if not symbol:
+        return None
+    return get_market_caps_mm_fmp([symbol]).get(symbol)
+
+
 def _get_market_cap_mm_yfinance_internal(ticker: str) -> Optional[MarketCapResult]:
     """
     Yahoo/yfinance fallback (NOT reliable on Railway).
@@ -127,24 +343,24 @@ def _get_market_cap_mm_yfinance_internal(ticker: str) -> Optional[MarketCapResul
         return None
 
     try:
-        t = yf.Ticker(symbol)
-        info = t.info or {}
+        # fast_info only: .info (and fast_info.market_cap, which falls back to it)
+        # goes through Yahoo's cookie/crumb negotiation, often with a 401 retry.
+        fi = yf.Ticker(symbol).fast_info
 
-        mc = _safe_float(info.get("marketCap"))
-        if mc is None or mc <= 0:
+        shares = _safe_float(fi.shares)
+        price = _safe_float(fi.last_price)
+        if not shares or not price or shares <= 0 or price <= 0:
             return None
 
-        currency = str(info.get("currency") or "USD")
+        currency = str(fi.currency or "USD")
 
         return MarketCapResult(
-            market_cap_mm=mc / 1_000_000.0,
+            market_cap_mm=shares * price / 1_000_000.0,
             source="yfinance",
             currency=currency,
             as_of_utc=_now_utc_iso(),
-            details="ticker.info.marketCap",
+            details="fast_info: shares * last_price",
         )
-    except (json.JSONDecodeError, ValueError, KeyError):
-        return None
     except Exception:
         return None
 
@@ -159,16 +375,104 @@ def get_market_cap_mm_yfinance(ticker: str) -> Optional[MarketCapResult]:
            ALLOW_YFINANCE_FALLBACK=true
          Default: disabled (prevents 429 / blocks / 500s)
 
+    Results are cached per ticker: successes for ~CACHE_TTL_SECONDS (then
+    served stale for up to STALE_TTL_SECONDS while refreshing in the
+    background), failures for ~NEGATIVE_CACHE_TTL_SECONDS. Concurrent misses
+    for the same ticker share one upstream lookup.
+
     Returns:
       MarketCapResult or None (never raises)
     """
-    # 1) FMP first
-    res = get_market_cap_mm_fmp(ticker)
-    if res is not None:
-        return res
+    symbol = (ticker or "").strip().upper()
+    if not symbol:
+        return None
 
-    # 2) Optional yfinance fallback
-    if _env_bool("ALLOW_YFINANCE_FALLBACK", default=False):
-        return _get_market_cap_mm_yfinance_internal(ticker)
+    hit, cached = _cache_get(symbol)
+    if hit:
+        return cached
+    return _fetch_coalesced(symbol)
+
+
+def _fetch_coalesced(symbol: str) -> Optional[MarketCapResult]:
+    # Single-flight: the first miss fetches, later misses wait on its Future.
+    with _LOCK:
+        hit, cached = _cache_get(symbol, allow_stale=False)
+        if hit:
+            return cached
+        fut = _INFLIGHT.get(symbol)
+        leader = fut is None
+        if leader:
+            fut = _INFLIGHT[symbol] = Future()
+
+    if not leader:
+        try:
+            return fut.result(timeout=INFLIGHT_WAIT_SECONDS)
+        except Exception:
+            return None
+
+    res: Optional[MarketCapResult] = None
+    try:
+        # 1) FMP first
+        res = get_market_cap_mm_fmp(symbol)
+
+        # 2) Optional yfinance fallback
+        if res is None and ALLOW_YFINANCE_FALLBACK:
+            res = _get_market_cap_mm_yfinance_internal(symbol)
+
+        _cache_set(symbol, res)
+    finally:
+        with _LOCK:
+            _INFLIGHT.pop(symbol, None)
+        fut.set_result(res)
+    return res
+
+
+# Upper bound on concurrent outbound lookups for batch calls
+BATCH_MAX_WORKERS = 16
+
+
+def get_market_caps_mm(tickers: Iterable[str]) -> Dict[str, Optional[MarketCapResult]]:
+    """
+    Batch variant of get_market_cap_mm_yfinance.
+
+    Cache misses go to FMP in one batched stable/profile request (per
+    FMP_BATCH_SIZE tickers). Anything FMP can't price falls through to the
+    per-ticker path concurrently (I/O-bound, so threads over the pooled
+    session overlap the network waits). Results are keyed by uppercased
+    ticker; never raises.
+    """
+    symbols = list(dict.fromkeys(s for s in ((t or "").strip().upper() for t in tickers) if s))
+    if not symbols:
+        return {}
+    if len(symbols) == 1:
+        return {symbols[0]: get_market_cap_mm_yfinance(symbols[0])}
+
+    out: Dict[str, Optional[MarketCapResult]] = {}
+    misses = []
+    for s in symbols:
+        hit, out[s] = _cache_get(s)
+        if not hit:
+            misses.append(s)
+    if not misses:
+        return out
+
+    for sym, res in get_market_caps_mm_fmp(misses).items():
+        _cache_set(sym, res)
+        out[sym] = res
+
+    rest = [s for s in misses if out[s] is None]
+    if not rest:
+        return out
+    if not ALLOW_YFINANCE_FALLBACK:
+        for s in rest:
+            _cache_set(s, None)
+        return out
+
+    def _fallback(symbol: str) -> Optional[MarketCapResult]:
+        res = _get_market_cap_mm_yfinance_internal(symbol)
+        _cache_set(symbol, res)
+        return res
 
-    return None
+    with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(rest))) as ex:
+        out.update(zip(rest, ex.map(_fallback, rest)))
+    return out
@@ -12,7 +12,7 @@ def _env(key: str, default: str) -> str:
 APP_ENV = _env("APP_ENV", "dev")
 
 # Comma-separated list of allowed origins for CORS (e.g. "http://localhost:5173,https://myapp.vercel.app")
-CORS_ALLOW_ORIGINS = [o.strip() for o in _env("CORS_ALLOW_ORIGINS", "*").split(",") if o.strip()]
+CORS_ALLOW_ORIGINS: tuple[str, ...] = tuple(o.strip() for o in _env("CORS_ALLOW_ORIGINS", "*").split(",") if o.strip())
 
 # Where uploaded inputs + outputs are stored per job
 STORAGE_DIR = Path(_env("STORAGE_DIR", str(Path(__file__).resolve().parents[1] / "storage"))).resolve()
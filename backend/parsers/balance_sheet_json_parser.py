@@ -27,12 +27,37 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import copy
 import json
+import mmap
+import os
 import re
-from dataclasses import dataclass, asdict
+from bisect import bisect_right
+from dataclasses import dataclass, field, fields
 from datetime import date
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# orjson is much faster on large filings; stdlib json is the fallback
+try:
+    import orjson
+
+    def _loads(data: bytes | memoryview) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # stdlib also accepts NaN/Infinity tokens, which some exporters emit
+            return json.loads(bytes(data))
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:  # pragma: no cover
+    def _loads(data: bytes | memoryview) -> Any:
+        return json.loads(bytes(data))
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
 
 
 # -----------------------------
@@ -40,9 +65,15 @@ from typing import Any, Dict, List, Optional, Tuple
 # -----------------------------
 
 def _safe_float(x: Any) -> Optional[float]:
+    # Fast lane: JSON numbers arrive as float/int and need no cleanup or try/except
+    tp = type(x)
+    if tp is float:
+        return x
+    if tp is int:
+        return float(x)
+    if x is None:
+        return None
     try:
-        if x is None:
-            return None
         if isinstance(x, str):
             t = x.strip().replace(",", "")
             if t in {"", "-", "—"}:
@@ -53,10 +84,46 @@ def _safe_float(x: Any) -> Optional[float]:
         return None
 
 
+# Above this size, parse straight from the page cache via mmap instead of copying into a bytes object
+MMAP_MIN_BYTES = 8 * 1024 * 1024
+
+# Opt-in memo of parsed inputs (BALANCE_SHEET_JSON_CACHE=1), for scripts that extract the
+# same files repeatedly in one process. Off by default: the API gives every job its own
+# input paths, so a path-keyed cache would never hit there. Read once at import.
+_JSON_CACHE = (os.getenv("BALANCE_SHEET_JSON_CACHE") or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _load_json(path_str: str, size: int) -> Any:
+    with open(path_str, "rb") as f:
+        if size < MMAP_MIN_BYTES:
+            return _loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return _loads(view)
+
+
+@lru_cache(maxsize=16)
+def _load_json_cached(path_str: str, mtime_ns: int, size: int) -> Any:
+    return _load_json(path_str, size)
+
+
+def load_json(path: str | Path) -> Any:
+    """
+    Parse a JSON file. With BALANCE_SHEET_JSON_CACHE=1 the parse is memoized on
+    (path, mtime, size) and each call gets its own deep copy.
+    """
+    st = os.stat(path)
+    if not _JSON_CACHE:
+        return _load_json(str(path), st.st_size)
+    return copy.deepcopy(_load_json_cached(str(path), st.st_mtime_ns, st.st_size))
+
+
 def _parse_iso_date(d: Optional[str]) -> Optional[date]:
     if not d:
         return None
     try:
+        # Fixed-width YYYY-MM-DD: slice instead of split
+        if len(d) == 10 and d[4] == "-" and d[7] == "-" and d.count("-") == 2:
+            return date(int(d[0:4]), int(d[5:7]), int(d[8:10]))
         y, m, dd = d.split("-")
         return date(int(y), int(m), int(dd))
     except Exception:
@@ -81,7 +148,10 @@ def _to_millions(value_obj: Any) -> Optional[float]:
     if not isinstance(value_obj, dict):
         return None
 
-    nv = _safe_float(value_obj.get("numeric_value"))
+    nv = value_obj.get("numeric_value")
+    if isinstance(nv, (int, float)):
+        return nv / 1_000_000.0
+    nv = _safe_float(nv)
     if nv is not None:
         return nv / 1_000_000.0
 
@@ -99,25 +169,109 @@ def _to_millions(value_obj: Any) -> Optional[float]:
     return dv * (10 ** (scale - 6))
 
 
+_PUNCT_RE = re.compile(r"[^\w\s]+")
+# Same character class for ASCII as a str.translate table (no regex engine on the common path)
+_PUNCT_TABLE = {c: " " for c in range(128) if _PUNCT_RE.match(chr(c))}
+
+
+@lru_cache(maxsize=4096)
 def _norm_label(s: str) -> str:
-    s = (s or "").lower().strip()
-    s = re.sub(r"\s+", " ", s)
-    s = re.sub(r"[^\w\s]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    # punctuation -> space, then collapse/strip whitespace (str.split is the C fast path)
+    s = (s or "").lower()
+    s = s.translate(_PUNCT_TABLE) if s.isascii() else _PUNCT_RE.sub(" ", s)
+    return " ".join(s.split())
 
 
-def _iter_rows(balance_sheet: Dict[str, Any]) -> List[Dict[str, Any]]:
-    rows = balance_sheet.get("rows") or []
-    return [r for r in rows if isinstance(r, dict)]
+@dataclass
+class RowIndex:
+    """
+    One pass over the balance sheet rows, shared by every row lookup.
+    Structure-of-arrays: position i in each list refers to rows[i].
+      rows:              dict rows in statement order
+      by_concept:        exact `concept` -> position of its first row
+      by_concept_or_tag: stripped `concept`/`tag` -> position of its first row
+      labels:            lowercased label/name/title (find_row)
+      norm_labels:       _norm_label(label) (find_row_by_concept_or_label)
+    The label lists are only built if a lookup falls through to label matching.
+    """
+    rows: List[Dict[str, Any]]
+    by_concept: Dict[str, int]
+    by_concept_or_tag: Dict[str, int]
+    # Lazily built (blob, row start offsets) per label list, for large-sheet scans
+    blobs: Dict[str, Tuple[str, List[int]]] = field(default_factory=dict, repr=False)
+
+    @cached_property
+    def labels(self) -> List[str]:
+        return [str(r.get("label") or r.get("name") or r.get("title") or "").lower() for r in self.rows]
+
+    @cached_property
+    def norm_labels(self) -> List[str]:
+        return [_norm_label(str(r.get("label") or "")) for r in self.rows]
+
+
+# Above this many rows, a keyword scan is one C-level regex search over all labels
+# joined into a single string, instead of a Python loop over rows.
+BLOB_SCAN_MIN_ROWS = 512
+_BLOB_SEP = "\x00"
+
+
+@lru_cache(maxsize=64)
+def _keyword_pattern(keywords: Tuple[str, ...]) -> re.Pattern[str]:
+    """One alternation over all keywords, so a blob is scanned once instead of once per keyword."""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+def _first_label_match(idx: RowIndex, which: str, keywords: List[str]) -> Optional[int]:
+    """Position of the first row whose `which` label contains any keyword, or None."""
+    labels: List[str] = getattr(idx, which)
+    if not labels or not keywords:
+        return None
+    if len(labels) < BLOB_SCAN_MIN_ROWS or any(_BLOB_SEP in k for k in keywords):
+        for i, label in enumerate(labels):
+            if any(k in label for k in keywords):
+                return i
+        return None
+
+    cached = idx.blobs.get(which)
+    if cached is None:
+        starts: List[int] = []
+        pos = 0
+        for label in labels:
+            starts.append(pos)
+            pos += len(label) + 1
+        cached = idx.blobs[which] = (_BLOB_SEP.join(labels), starts)
+    blob, starts = cached
+
+    # Keywords can't span the separator, so the leftmost hit is in the earliest matching row
+    m = _keyword_pattern(tuple(keywords)).search(blob)
+    if m is None:
+        return None
+    return bisect_right(starts, m.start()) - 1
+
+
+def build_row_index(balance_sheet: Dict[str, Any]) -> RowIndex:
+    raw = balance_sheet.get("rows") or balance_sheet.get("line_items")
+    rows = [r for r in raw if isinstance(r, dict)] if isinstance(raw, list) else []
+
+    by_concept: Dict[str, int] = {}
+    by_concept_or_tag: Dict[str, int] = {}
+    for i, r in enumerate(rows):
+        by_concept.setdefault(str(r.get("concept") or ""), i)
+        by_concept_or_tag.setdefault(str(r.get("concept") or r.get("tag") or "").strip(), i)
+
+    return RowIndex(
+        rows=rows,
+        by_concept=by_concept,
+        by_concept_or_tag=by_concept_or_tag,
+    )
 
 
 # -----------------------------
 # Period selection
 # -----------------------------
 
-@dataclass(frozen=True)
-class PeriodMeta:
+class PeriodMeta(NamedTuple):
+    # A tuple, not a frozen dataclass: one allocation per column with no __setattr__ machinery
     key: str
     fiscal_year: Optional[int]
     fiscal_quarter: Optional[int]
@@ -166,7 +320,9 @@ def select_period_key_for_annual_period(balance_sheet: Dict[str, Any], annual_pe
         if periods:
             return periods[0].key, periods[0].end_date
         # fallback: first row.values key
-        for r in _iter_rows(balance_sheet):
+        for r in balance_sheet.get("rows") or []:
+            if not isinstance(r, dict):
+                continue
             vals = r.get("values")
             if isinstance(vals, dict) and vals:
                 k = next(iter(vals.keys()))
@@ -179,14 +335,21 @@ def select_period_key_for_annual_period(balance_sheet: Dict[str, Any], annual_pe
         ed = _parse_iso_date(p.end_date) or date(1900, 1, 1)
         return (q4, inst, ed)
 
-    best = sorted(candidates, key=score, reverse=True)[0]
+    # Only the top candidate matters: a linear max, first-wins on ties like the stable sort it replaces
+    best = max(candidates, key=score)
     return best.key, best.end_date
 
 
 # -----------------------------
 # Row finding
 # -----------------------------
-def find_row(balance_sheet: dict, concepts: list[str], label_any_keywords: list[str] | None = None) -> dict | None:
+def find_row(
+    balance_sheet: dict,
+    concepts: list[str],
+    label_any_keywords: list[str] | None = None,
+    *,
+    index: RowIndex | None = None,
+) -> dict | None:
     """
     Finds the first matching balance sheet row by:
       1) concept in `concepts` (priority order)
@@ -194,27 +357,24 @@ def find_row(balance_sheet: dict, concepts: list[str], label_any_keywords: list[
 
     Expects balance_sheet rows in balance_sheet["rows"] OR balance_sheet["line_items"].
     Adjust the row list key if your JSON uses a different key.
+    Pass a prebuilt `index` to reuse one row scan across lookups.
     """
-    rows = balance_sheet.get("rows") or balance_sheet.get("line_items") or []
-    if not isinstance(rows, list):
-        return None
+    idx = index if index is not None else build_row_index(balance_sheet)
 
     # Normalize keywords
     kws = [k.lower() for k in (label_any_keywords or [])]
 
     # 1) concept match in priority order
     for concept in concepts:
-        for r in rows:
-            c = (r.get("concept") or r.get("tag") or "").strip()
-            if c == concept:
-                return r
+        i = idx.by_concept_or_tag.get(concept)
+        if i is not None:
+            return idx.rows[i]
 
     # 2) label keyword match
     if kws:
-        for r in rows:
-            label = (r.get("label") or r.get("name") or r.get("title") or "").lower()
-            if any(k in label for k in kws):
-                return r
+        i = _first_label_match(idx, "labels", kws)
+        if i is not None:
+            return idx.rows[i]
 
     return None
 
@@ -224,23 +384,22 @@ def find_row_by_concept_or_label(
     *,
     concept_candidates: List[str],
     label_keywords_any: List[str],
+    index: Optional[RowIndex] = None,
 ) -> Optional[Dict[str, Any]]:
+    idx = index if index is not None else build_row_index(balance_sheet)
     concept_set = {c for c in concept_candidates if c}
     keywords = [_norm_label(k) for k in label_keywords_any if k and k.strip()]
 
-    # 1) concept match
-    if concept_set:
-        for r in _iter_rows(balance_sheet):
-            concept = str(r.get("concept") or "")
-            if concept in concept_set:
-                return r
+    # 1) concept match (earliest row among the candidates)
+    hits = [idx.by_concept[c] for c in concept_set if c in idx.by_concept]
+    if hits:
+        return idx.rows[min(hits)]
 
     # 2) label keyword match
     if keywords:
-        for r in _iter_rows(balance_sheet):
-            label = _norm_label(str(r.get("label") or ""))
-            if any(k in label for k in keywords):
-                return r
+        i = _first_label_match(idx, "norm_labels", keywords)
+        if i is not None:
+            return idx.rows[i]
 
     return None
 
@@ -258,11 +417,12 @@ def build_provenance(row: Optional[Dict[str, Any]], period_key: str) -> Optional
     if not row:
         return None
     vals = row.get("values") if isinstance(row.get("values"), dict) else {}
+    raw = vals.get(period_key)
     return {
         "concept": row.get("concept"),
         "label": row.get("label"),
         "period_key": period_key,
-        "raw_value_obj": vals.get(period_key),
+        "raw_value_obj": raw,
     }
 
 
@@ -291,8 +451,8 @@ class BalanceSheetExtract:
 # -----------------------------
 
 def extract_required_balance_sheet_data(balance_sheet_json_path: str | Path, metadata_json_path: str | Path) -> Dict[str, Any]:
-    bs = json.loads(Path(balance_sheet_json_path).read_text(encoding="utf-8"))
-    md = json.loads(Path(metadata_json_path).read_text(encoding="utf-8"))
+    bs = load_json(balance_sheet_json_path)
+    md = load_json(metadata_json_path)
 
     annual_period_raw = md.get("annual_period")
     if annual_period_raw is None:
@@ -304,7 +464,7 @@ def extract_required_balance_sheet_data(balance_sheet_json_path: str | Path, met
     company_name = (
         bs.get("company_name")
         or bs.get("entity_name")
-        or (md.get("company_name") if isinstance(md, dict) else None)
+        or md.get("company_name")
         or "Company"
     )
     ticker = bs.get("ticker") or md.get("ticker")
@@ -326,8 +486,12 @@ def extract_required_balance_sheet_data(balance_sheet_json_path: str | Path, met
     # )
 
     # --- CASH (required for Net Debt) ---
+    # One scan of the rows serves both lookups below
+    row_index = build_row_index(bs)
+
     cash_row = find_row(
         balance_sheet=bs,
+        index=row_index,
         concepts=[
             # ✅ prefer combined cash FIRST (this is what AAP.html uses)
             "CashCashEquivalentsRestrictedCashAndRestrictedCashEquivalents",
@@ -347,6 +511,7 @@ def extract_required_balance_sheet_data(balance_sheet_json_path: str | Path, met
     # Noncontrolling interests row (default 0 if missing)
     nci_row = find_row_by_concept_or_label(
         bs,
+        index=row_index,
         concept_candidates=[
             "us-gaap:MinorityInterest",
             "us-gaap:NoncontrollingInterest",
@@ -380,7 +545,8 @@ def extract_required_balance_sheet_data(balance_sheet_json_path: str | Path, met
         },
     )
 
-    return asdict(out)
+    # Shallow on purpose: every field is a scalar or a dict built just above
+    return {f.name: getattr(out, f.name) for f in fields(out)}
 
 
 # -----------------------------
@@ -399,9 +565,9 @@ def main() -> None:
     if args.out:
         p = Path(args.out)
         p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        p.write_bytes(_dumps(result))
     else:
-        print(json.dumps(result, indent=2))
+        print(_dumps(result).decode("utf-8"))
 
 
 if __name__ == "__main__":
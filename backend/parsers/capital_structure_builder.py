@@ -27,10 +27,21 @@ from __future__ import annotations
 
 import argparse
 import json
+from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date
+from math import fsum
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:  # pragma: no cover
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
 # from debt_note_html_parser import extract_debt_instruments_from_debt_note
 
 # Import your existing balance sheet + debt parsers from project.
@@ -42,16 +53,31 @@ from debt_note_html_parser import extract_debt_instruments_from_debt_note
 # Helpers
 # ----------------------------
 
-_MONTHS = [
+_MONTHS = (
     "January","February","March","April","May","June",
     "July","August","September","October","November","December"
-]
+)
+
+# All-caps legal suffix -> how it reads after the company name
+_SUFFIX_MAP = {"INC": "Inc.", "CORP": "Corp.", "CO": "Co.", "LLC": "LLC", "LTD": "Ltd."}
 
 def iso_to_long_date(iso: str) -> str:
+    # Fixed-width YYYY-MM-DD: slice instead of split
+    if len(iso) == 10 and iso[4] == "-" and iso[7] == "-" and iso.count("-") == 2:
+        return f"{_MONTHS[int(iso[5:7])-1]} {int(iso[8:10])}, {int(iso[0:4])}"
     y, m, d = iso.split("-")
     return f"{_MONTHS[int(m)-1]} {int(d)}, {int(y)}"
 
 
+def _capitalize_words(words: List[str]) -> str:
+    joined = " ".join(words)
+    # str.title() is one C call, and matches per-word capitalize() when the words are
+    # plain ASCII letters (it differs after digits, apostrophes, hyphens, ...)
+    if joined.isascii() and joined.replace(" ", "").isalpha():
+        return joined.title()
+    return " ".join(w.capitalize() for w in words)
+
+
 def prettify_company_name(name: str) -> str:
     """
     Convert "ADVANCE AUTO PARTS INC" -> "Advance Auto Parts, Inc."
@@ -71,14 +97,14 @@ def prettify_company_name(name: str) -> str:
     suffix = parts[-1]
     base = parts[:-1]
 
-    base_title = " ".join(w.capitalize() for w in base) if base else ""
-    if suffix in {"INC", "CORP", "CO", "LLC", "LTD"}:
-        suffix_map = {"INC": "Inc.", "CORP": "Corp.", "CO": "Co.", "LLC": "LLC", "LTD": "Ltd."}
+    base_title = _capitalize_words(base) if base else ""
+    pretty_suffix = _SUFFIX_MAP.get(suffix)
+    if pretty_suffix is not None:
         if base_title:
-            return f"{base_title}, {suffix_map[suffix]}"
-        return suffix_map[suffix]
+            return f"{base_title}, {pretty_suffix}"
+        return pretty_suffix
 
-    return " ".join(w.capitalize() for w in parts)
+    return _capitalize_words(parts)
 
 
 def round3(x: Optional[float]) -> Optional[float]:
@@ -86,27 +112,26 @@ def round3(x: Optional[float]) -> Optional[float]:
 
 
 def sum_amounts(instruments: List[Dict[str, Any]]) -> float:
-    s = 0.0
-    for ins in instruments:
-        v = ins.get("amount_outstanding_mm")
-        if v is None:
-            continue
-        s += float(v)
-    return round(s, 3)
+    # fsum: exact summation in C, no accumulated float drift before rounding
+    vals = (ins.get("amount_outstanding_mm") for ins in instruments)
+    return round(fsum(float(v) for v in vals if v is not None), 3)
 
 
 def group_by_priority(instruments: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-    out: Dict[str, List[Dict[str, Any]]] = {}
+    out: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
     for ins in instruments:
-        p = ins.get("priority") or "Unsecured"
-        out.setdefault(p, []).append(ins)
+        out[ins.get("priority") or "Unsecured"].append(ins)
     return out
 
 
 def normalize_instrument_amounts(instruments: List[Dict[str, Any]]) -> None:
+    # round3 inlined: this runs for every instrument
+    r, f = round, float
     for ins in instruments:
-        ins["amount_outstanding_mm"] = round3(ins.get("amount_outstanding_mm"))
-        ins["amount_available_mm"] = round3(ins.get("amount_available_mm"))
+        v = ins.get("amount_outstanding_mm")
+        ins["amount_outstanding_mm"] = None if v is None else r(f(v), 3)
+        v = ins.get("amount_available_mm")
+        ins["amount_available_mm"] = None if v is None else r(f(v), 3)
 
 
 def unsecured_sort_key(inst):
@@ -133,6 +158,7 @@ def build_capital_structure(
     lease_path: str,
     metadata_path: str,
     market_cap_mm: float,
+    period_end_text: Optional[str] = None,
 ) -> Dict[str, Any]:
     # Balance sheet extract (cash + NCI + selected period ISO end date)
     bs = extract_required_balance_sheet_data(balance_path, metadata_path)
@@ -140,7 +166,9 @@ def build_capital_structure(
     if not iso_end:
         raise ValueError("Could not derive selected_period_end_date from balance sheet.")
 
-    period_end_text = iso_to_long_date(iso_end)
+    # Optional override (e.g. "December 28, 2024"); otherwise derived from the balance sheet
+    if not period_end_text:
+        period_end_text = iso_to_long_date(iso_end)
 
     company_name_raw = bs.get("company_name") or "Company"
     company_name_display = prettify_company_name(str(company_name_raw))
@@ -173,6 +201,7 @@ def build_capital_structure(
     pri_groups_map = group_by_priority(all_instruments)
 
     priority_groups: List[Dict[str, Any]] = []
+    subtotals: Dict[str, float] = {}
     # for priority in ["Senior Secured", "Unsecured", "Subordinated"]:
     #     if priority not in pri_groups_map:
     #         continue
@@ -192,7 +221,7 @@ def build_capital_structure(
             insts = sorted(insts, key=unsecured_sort_key)
 
         subtotal = round(sum_amounts(insts), 3)
-
+        subtotals[priority] = subtotal
 
         priority_groups.append(
             {
@@ -206,7 +235,11 @@ def build_capital_structure(
         {"issuer": issuer, "priority_groups": priority_groups}
     ]
 
-    total_debt_mm = round(sum_amounts(all_instruments), 3)
+    # Reuse the group subtotals; only priorities outside the three columns still need summing
+    total_debt_mm = round(
+        fsum(subtotals[p] if p in subtotals else sum_amounts(insts) for p, insts in pri_groups_map.items()),
+        3,
+    )
 
     cash_mm = round3(bs.get("cash_and_cash_equivalents_mm")) or 0.0
     nci_mm = round3(bs.get("noncontrolling_interests_mm")) or 0.0
@@ -261,6 +294,7 @@ def main() -> None:
     ap.add_argument("--lease", required=True, help="Path to lease_note.html")
     ap.add_argument("--metadata", required=True, help="Path to metadata.json")
     ap.add_argument("--market-cap-mm", required=True, type=float, help="Market cap in $mm (e.g., 2592)")
+    ap.add_argument("--period-end", default=None, help='Optional period end text override, e.g. "December 28, 2024"')
     ap.add_argument("--out", required=True, help="Output path for built_capital_structure.json")
     args = ap.parse_args()
 
@@ -270,11 +304,12 @@ def main() -> None:
         lease_path=args.lease,
         metadata_path=args.metadata,
         market_cap_mm=args.market_cap_mm,
+        period_end_text=args.period_end,
     )
 
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(json.dumps(built, indent=2), encoding="utf-8")
+    out_path.write_bytes(_dumps(built))
 
 
 if __name__ == "__main__":
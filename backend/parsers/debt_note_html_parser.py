@@ -45,14 +45,27 @@ CLI:
 from __future__ import annotations
 
 import argparse
+import copy
 import datetime as _dt
+import html
 import json
+import os
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:  # pragma: no cover
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
 
 
 MONTHS = {
@@ -61,6 +74,47 @@ MONTHS = {
     "september": 9, "october": 10, "november": 11, "december": 12,
 }
 
+# Compiled once at import; the helpers below run per table cell / narrative match
+_DATE_MDY = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_DATE_MONTH = re.compile(r"([A-Za-z]+)\s+(\d{1,2}),\s*(\d{4})")
+_DUE_IN_NAME = re.compile(r"\bdue\s+([A-Za-z]+\s+\d{1,2},\s*\d{4})\b", re.IGNORECASE)
+_DUE_ANY = re.compile(r"\bdue\s+[A-Za-z]+\s+\d{1,2},\s*\d{4}\b", re.IGNORECASE)
+_NUM_FALLBACK = re.compile(r"-?\d+(?:\.\d+)?")
+# Plain numeric cells like "1,234", "$ 5.90" or "(1,234)"; anything else takes the general path
+_NUM_CELL = re.compile(r"(\()?\$?\s*(-?[0-9][0-9,]*(?:\.[0-9]+)?)\s*(\))?")
+_EMPTY_CELLS = frozenset({"—", "-", "–", "—-", "— —"})
+_ISSUED_BY = re.compile(r"\bissued by\s+([A-Z][A-Za-z0-9&\-\., ]+)\b")
+_AGREEMENT_PREFIX = re.compile(r"^(?:of\s+)?(?:the\s+)?", re.IGNORECASE)
+# Instrument-type keywords, matched as substrings of the lowercased name
+_CREDIT_FACILITY_WORDS = re.compile(r"revolver|revolving|credit facility|rcf|line of credit|credit agreement")
+_BOND_WORDS = re.compile(r"note|debenture")  # "note" also covers "notes" / "senior notes"
+# Markup that get_text() never returns as text, then any remaining tag
+_NON_TEXT = re.compile(r"<!--.*?-->|<(script|style)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[A-Za-z/!?][^>]*>")
+
+# "... senior unsecured notes due <date> ... were issued <date>"
+_NOTES_ISSUED = re.compile(
+    r"senior\s+unsecured\s+notes\s+due\s+([A-Za-z]+\s+\d{1,2},\s*\d{4}).{0,250}?were\s+issued\s+([A-Za-z]+\s+\d{1,2},\s*\d{4})",
+    flags=re.IGNORECASE | re.DOTALL,
+)
+_NOTES_ISSUED_TAIL = re.compile(r"(?=(were\s+issued\s+[A-Za-z]+\s+\d{1,2},\s*\d{4}))", re.IGNORECASE)
+# "On <date> ... (unsecured|secured) revolving credit facility ... (the “<NAME> Credit Agreement”)"
+_FACILITY_START = re.compile(
+    r"\bOn\s+([A-Za-z]+\s+\d{1,2},\s*\d{4}),\s+.*?\b(?:(secured|unsecured)\s+)?revolving\s+credit\s+facility\b.*?\(\s*the\s+[“\"']([^”\"']*?Credit Agreement)[”\"']\s*\)",
+    flags=re.IGNORECASE | re.DOTALL,
+)
+_FACILITY_START_TAIL = re.compile(r"(?=([”\"']\s*\)))")
+# "... maturity date ... <NAME> Credit Agreement ... to <date>"
+_FACILITY_MATURITY = re.compile(
+    r"\bmaturity\s+date\b.*?(?:the\s+)?([A-Za-z0-9][A-Za-z0-9\s\-]{0,60}?Credit Agreement)\b.*?\bto\s+([A-Za-z]+\s+\d{1,2},\s*\d{4})",
+    flags=re.IGNORECASE | re.DOTALL,
+)
+_FACILITY_MATURITY_TAIL = re.compile(r"(?=(\bto\s+[A-Za-z]+\s+\d{1,2},\s*\d{4}))", re.IGNORECASE)
+# Literals every match of the patterns above contains; a plain search rules a whole filing out.
+# Same regex case folding as the patterns (str.lower() would miss e.g. "ſ" matching "s").
+_WERE_ISSUED = re.compile(r"were\s+issued", re.IGNORECASE)
+_CREDIT_AGREEMENT = re.compile(r"credit agreement", re.IGNORECASE)
+
 
 def _to_mm_if_thousands(v: Optional[float]) -> Optional[float]:
     if v is None:
@@ -71,24 +125,27 @@ def _to_mm_if_thousands(v: Optional[float]) -> Optional[float]:
 
 
 def _clean_space(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").replace("\xa0", " ")).strip()
-
-
-def _lower(s: str) -> str:
-    return (s or "").lower()
+    # str.split() splits on the same whitespace as \s (NBSP included) and drops the ends
+    return " ".join(s.split()) if s else ""
 
 
 def _parse_us_date(text: str) -> Optional[_dt.date]:
     """
     Parse dates like "March 9, 2026" (month name) or "03/09/2026" (mm/dd/yyyy).
     """
-    t = _clean_space(text)
+    # Both patterns take \s+ / \s* wherever whitespace may appear, so stripping is enough
+    t = text.strip() if text else ""
     if not t:
         return None
 
+    # The first character decides which of the two formats can match at all
+    c = t[0]
+
     # mm/dd/yyyy
-    m = re.fullmatch(r"(\d{1,2})/(\d{1,2})/(\d{4})", t)
-    if m:
+    if c.isdigit():
+        m = _DATE_MDY.fullmatch(t)
+        if not m:
+            return None
         mm, dd, yy = int(m.group(1)), int(m.group(2)), int(m.group(3))
         try:
             return _dt.date(yy, mm, dd)
@@ -96,7 +153,7 @@ def _parse_us_date(text: str) -> Optional[_dt.date]:
             return None
 
     # Month d, yyyy
-    m = re.fullmatch(r"([A-Za-z]+)\s+(\d{1,2}),\s*(\d{4})", t)
+    m = _DATE_MONTH.fullmatch(t) if c.isalpha() else None
     if m:
         mon = MONTHS.get(m.group(1).lower())
         if not mon:
@@ -118,7 +175,7 @@ def _extract_due_date_text_from_name(name: str) -> Optional[str]:
     """
     Extracts "March 9, 2026" from "... due March 9, 2026" (case-insensitive).
     """
-    m = re.search(r"\bdue\s+([A-Za-z]+\s+\d{1,2},\s*\d{4})\b", name, flags=re.IGNORECASE)
+    m = _DUE_IN_NAME.search(name)
     if not m:
         return None
     return _clean_space(m.group(1))
@@ -138,8 +195,13 @@ def _safe_float_from_text(t: str) -> Optional[float]:
     We do NOT scale here; your pipeline already expects MM numbers. This function just parses.
     """
     s = _clean_space(t)
-    if not s or s in {"—", "-", "–", "—-", "— —"}:
+    if not s or s in _EMPTY_CELLS:
         return None
+    m = _NUM_CELL.fullmatch(s)
+    if m:
+        # Parentheses negate only as a pair, exactly like the general path below
+        v = float(m.group(2).replace(",", ""))
+        return -v if m.group(1) and m.group(3) else v
     # remove currency / commas / parentheses
     neg = False
     if s.startswith("(") and s.endswith(")"):
@@ -155,20 +217,20 @@ def _safe_float_from_text(t: str) -> Optional[float]:
         return -v if neg else v
     except Exception:
         # last resort: find a number substring
-        m = re.search(r"-?\d+(?:\.\d+)?", s)
+        m = _NUM_FALLBACK.search(s)
         if not m:
             return None
         v = float(m.group(0))
         return -v if neg else v
 
 
-def _classify_instrument_type(name_text: str) -> str:
-    t = _lower(name_text)
-    if any(k in t for k in ["revolver", "revolving", "credit facility", "rcf", "line of credit", "credit agreement"]):
+def _classify_instrument_type(lname: str) -> str:
+    """`lname` is the instrument name, already lowercased."""
+    if _CREDIT_FACILITY_WORDS.search(lname):
         return "credit_facility"
-    if "term loan" in t:
+    if "term loan" in lname:
         return "term_loan"
-    if any(k in t for k in ["note", "notes", "debenture", "senior notes"]):
+    if _BOND_WORDS.search(lname):
         return "bond"
     return "other_debt"
 
@@ -176,15 +238,34 @@ def _classify_instrument_type(name_text: str) -> str:
 def _extract_parent_issuer(text: str) -> Optional[str]:
     # Best-effort: "issued by X" or "the Company issued"
     # In most filings this isn't clean; keep None by default.
-    m = re.search(r"\bissued by\s+([A-Z][A-Za-z0-9&\-\., ]+)\b", text)
+    m = _ISSUED_BY.search(text)
     if m:
         return _clean_space(m.group(1))
     return None
 
 
-def _soup_text(soup: BeautifulSoup) -> str:
-    # Use a separator to avoid accidental concatenation of words
-    return _clean_space(soup.get_text(" "))
+def _finditer_narrative(pat: re.Pattern[str], tail: re.Pattern[str], text: str) -> Iterator[re.Match[str]]:
+    """
+    pat.finditer(text), stopped where the last possible match ends.
+    Every narrative pattern ends in a fixed tail (a date, a closing quote), so no match can
+    end past the last place `tail` (a lookahead capturing that tail) ends. Without the cut,
+    each unmatched start makes the DOTALL .*? gaps rescan to the end of the document.
+    """
+    end = max((m.end(1) for m in tail.finditer(text)), default=-1)
+    if end < 0:
+        return iter(())
+    return pat.finditer(text, 0, end)
+
+
+def _find_tags(root: Tag, names: Tuple[str, ...]) -> List[Tag]:
+    # Same result as root.find_all(list(names)), without bs4's per-node strainer matching
+    return [d for d in root.descendants if isinstance(d, Tag) and d.name in names]
+
+
+def _html_text(raw: str) -> str:
+    # Same text as soup.get_text(" "), without building nodes for the narrative:
+    # tags become a space separator (no accidental word concatenation), then entities decode
+    return _clean_space(html.unescape(_TAG.sub(" ", _NON_TEXT.sub(" ", raw))))
 
 
 def _build_issue_date_map_from_narrative(full_text: str) -> Dict[str, str]:
@@ -195,17 +276,12 @@ def _build_issue_date_map_from_narrative(full_text: str) -> Dict[str, str]:
       "... % senior unsecured notes due March 9, 2026 ... were issued March 9, 2023 ..."
     This is the *most reliable generic* pattern across issuers.
     """
-    t = full_text
-
     # capture due date + issued date
     # allow various punctuation / parentheses between them
-    pat = re.compile(
-        r"senior\s+unsecured\s+notes\s+due\s+([A-Za-z]+\s+\d{1,2},\s*\d{4}).{0,250}?were\s+issued\s+([A-Za-z]+\s+\d{1,2},\s*\d{4})",
-        flags=re.IGNORECASE | re.DOTALL,
-    )
-
     out: Dict[str, str] = {}
-    for m in pat.finditer(t):
+    if not _WERE_ISSUED.search(full_text):
+        return out
+    for m in _finditer_narrative(_NOTES_ISSUED, _NOTES_ISSUED_TAIL, full_text):
         due_txt = _clean_space(m.group(1))
         iss_txt = _clean_space(m.group(2))
         due_d = _parse_us_date(due_txt)
@@ -224,36 +300,27 @@ def _extract_credit_facilities_from_narrative(full_text: str) -> List[Dict[str,
       "... extended the maturity date ... to November 9, 2027."
     """
     t = full_text
+    # Both the facility and the maturity pattern need a "... Credit Agreement" name
+    if not _CREDIT_AGREEMENT.search(t):
+        return []
 
-    # 1) Find "On <date> ... (unsecured|secured) revolving credit facility ... (the “<NAME> Credit Agreement”)"
-    # Capture agreement label so we can later find maturity changes.
-    start_pat = re.compile(
-        r"\bOn\s+([A-Za-z]+\s+\d{1,2},\s*\d{4}),\s+.*?\b(?:(secured|unsecured)\s+)?revolving\s+credit\s+facility\b.*?\(\s*the\s+[“\"']([^”\"']*?Credit Agreement)[”\"']\s*\)",
-        flags=re.IGNORECASE | re.DOTALL,
-    )
-
-    # 2) Maturity date mentions, keyed by agreement name
-    maturity_pat = re.compile(
-        r"\bmaturity\s+date\b.*?(?:the\s+)?([A-Za-z0-9][A-Za-z0-9\s\-]{0,60}?Credit Agreement)\b.*?\bto\s+([A-Za-z]+\s+\d{1,2},\s*\d{4})",
-        flags=re.IGNORECASE | re.DOTALL,
-    )
-
-    # Collect maturity updates per agreement
+    # Collect maturity updates per agreement (_FACILITY_MATURITY), so each facility found
+    # by _FACILITY_START below can be matched to its latest maturity by agreement label.
     maturities: Dict[str, List[_dt.date]] = {}
-    for m in maturity_pat.finditer(t):
+    for m in _finditer_narrative(_FACILITY_MATURITY, _FACILITY_MATURITY_TAIL, t):
         agreement = _clean_space(m.group(1))
-        agreement = re.sub(r"^(?:of\s+)?(?:the\s+)?", "", agreement, flags=re.IGNORECASE)
+        agreement = _AGREEMENT_PREFIX.sub("", agreement)
         d = _parse_us_date(_clean_space(m.group(2)))
         if not agreement or not d:
             continue
         maturities.setdefault(agreement, []).append(d)
 
     out: List[Dict[str, Any]] = []
-    for m in start_pat.finditer(t):
+    for m in _finditer_narrative(_FACILITY_START, _FACILITY_START_TAIL, t):
         issue_txt = _clean_space(m.group(1))
         sec_unsec = _clean_space(m.group(2)) if m.group(2) else "unsecured"
         agreement = _clean_space(m.group(3))
-        agreement = re.sub(r"^(?:of\s+)?(?:the\s+)?", "", agreement, flags=re.IGNORECASE)
+        agreement = _AGREEMENT_PREFIX.sub("", agreement)
 
         issue_d = _parse_us_date(issue_txt)
         if not issue_d or not agreement:
@@ -294,36 +361,37 @@ def _extract_instruments_from_primary_table(soup: BeautifulSoup) -> Tuple[List[D
       - coupon is the next numeric-ish cell (or "variable")
     """
     notes: List[str] = []
-    tables = soup.find_all("table")
+    tables = _find_tags(soup, ("table",))
     if not tables:
         return [], notes
 
     def score_table(tab) -> int:
         txt = tab.get_text(" ", strip=True)
-        return len(re.findall(r"\bdue\s+[A-Za-z]+\s+\d{1,2},\s*\d{4}\b", txt, flags=re.IGNORECASE))
-
-    scored = [(score_table(t), i, t) for i, t in enumerate(tables)]
-    scored.sort(reverse=True, key=lambda x: x[0])
-    best_score, best_idx, best = scored[0]
-    if best_score == 0:
+        return len(_DUE_ANY.findall(txt))
+
+    # Single pass; strict ">" keeps the earliest table on ties, as the stable sort did
+    best_score, best_idx, best = 0, -1, None
+    for i, t in enumerate(tables):
+        score = score_table(t)
+        if score > best_score:
+            best_score, best_idx, best = score, i, t
+    if best is None:
         return [], notes
 
     notes.append(f"Selected table #{best_idx} as primary debt schedule (score={best_score}).")
 
     instruments: List[Dict[str, Any]] = []
 
-    rows = best.find_all("tr")
-    for r in rows:
-        cells = r.find_all(["td", "th"])
+    for r in _find_tags(best, ("tr",)):
+        cells = _find_tags(r, ("td", "th"))
         if not cells:
             continue
         cell_texts = [_clean_space(c.get_text(" ", strip=True)) for c in cells]
-        row_text = " | ".join(cell_texts)
 
         # Find the cell that contains 'due <date>' - treat that as instrument name cell
         name_idx = None
         for j, ct in enumerate(cell_texts):
-            if re.search(r"\bdue\s+[A-Za-z]+\s+\d{1,2},\s*\d{4}\b", ct, flags=re.IGNORECASE):
+            if _DUE_ANY.search(ct):
                 name_idx = j
                 break
         if name_idx is None:
@@ -355,8 +423,9 @@ def _extract_instruments_from_primary_table(soup: BeautifulSoup) -> Tuple[List[D
                     coupon = f
                     break
 
+        lname = name.lower()
         maturity_year = _extract_maturity_year_from_name(name)
-        priority = "Unsecured" if "unsecured" in _lower(name) else None
+        priority = "Unsecured" if "unsecured" in lname else None
         amount_mm = _to_mm_if_thousands(amount)
 
         instruments.append(
@@ -369,9 +438,10 @@ def _extract_instruments_from_primary_table(soup: BeautifulSoup) -> Tuple[List[D
                 "priority": priority,
                 "parent_issuer": None,
                 "issue_date": None,  # back-filled later
-                "instrument_type": _classify_instrument_type(name),
+                "instrument_type": _classify_instrument_type(lname),
                 "lien_level": None,
-                "provenance": {"source": "table", "table_index": best_idx, "row_text": row_text[:500]},
+                # Joined only for rows that become instruments, not for every row scanned
+                "provenance": {"source": "table", "table_index": best_idx, "row_text": " | ".join(cell_texts)[:500]},
             }
         )
 
@@ -394,11 +464,45 @@ def _extract_instruments_from_primary_table(soup: BeautifulSoup) -> Tuple[List[D
     return instruments, notes
 
 
+# Opt-in memo of parse results (DEBT_PARSER_CACHE=1), for scripts that re-parse the same
+# filing in one process. Off by default: the API gives every job its own input paths, so a
+# path-keyed cache would never hit there. Read once at import.
+_PARSE_CACHE = (os.getenv("DEBT_PARSER_CACHE") or "").strip().lower() in ("1", "true", "yes", "on")
+
+
 def parse_debt_note_html(html_path: str, period_end_date_text: Optional[str] = None, parent_company_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    With DEBT_PARSER_CACHE=1, memoized on (path, mtime, size) plus the arguments, so
+    re-parsing an unchanged file costs a stat; each call then gets its own deep copy.
+    """
+    if not _PARSE_CACHE:
+        return _parse_debt_note_html(str(html_path), period_end_date_text, parent_company_name)
+    st = os.stat(html_path)
+    cached = _parse_debt_note_html_cached(str(html_path), st.st_mtime_ns, st.st_size, period_end_date_text, parent_company_name)
+    return copy.deepcopy(cached)
+
+
+@lru_cache(maxsize=16)
+def _parse_debt_note_html_cached(
+    html_path: str,
+    mtime_ns: int,
+    size: int,
+    period_end_date_text: Optional[str],
+    parent_company_name: Optional[str],
+) -> Dict[str, Any]:
+    return _parse_debt_note_html(html_path, period_end_date_text, parent_company_name)
+
+
+def _parse_debt_note_html(
+    html_path: str,
+    period_end_date_text: Optional[str],
+    parent_company_name: Optional[str],
+) -> Dict[str, Any]:
     raw = Path(html_path).read_text(encoding="utf-8", errors="ignore")
-    soup = BeautifulSoup(raw, "html.parser")
+    # Only tables are needed as a tree; the narrative is read straight from the markup
+    soup = BeautifulSoup(raw, "lxml", parse_only=SoupStrainer("table"))
 
-    full_text = _soup_text(soup)
+    full_text = _html_text(raw)
 
     instruments, notes = _extract_instruments_from_primary_table(soup)
 
@@ -417,18 +521,19 @@ def parse_debt_note_html(html_path: str, period_end_date_text: Optional[str] = N
     if narrative_facilities:
         notes.append(f"Extracted {len(narrative_facilities)} credit facility instrument(s) from narrative.")
 
-    existing_names = {_lower(i["instrument_name"]) for i in instruments}
+    existing_names = {i["instrument_name"].lower() for i in instruments}
     for cf in narrative_facilities:
-        if _lower(cf["instrument_name"]) not in existing_names:
+        key = cf["instrument_name"].lower()
+        if key not in existing_names:
             instruments.append(cf)
+            existing_names.add(key)
 
-    # Fill in instrument_type, parent_issuer best-effort
+    # Fill in parent_issuer best-effort (table and narrative rows already carry instrument_type)
     parent_issuer = _extract_parent_issuer(full_text)
-    for ins in instruments:
-        if not ins.get("instrument_type"):
-            ins["instrument_type"] = _classify_instrument_type(ins["instrument_name"])
-        if parent_issuer and not ins.get("parent_issuer"):
-            ins["parent_issuer"] = parent_issuer
+    if parent_issuer:
+        for ins in instruments:
+            if not ins.get("parent_issuer"):
+                ins["parent_issuer"] = parent_issuer
 
     # Sort to match expected human outputs: maturity_year then name
     def sort_key(i: Dict[str, Any]) -> Tuple[int, str]:
@@ -460,12 +565,12 @@ def _cli() -> int:
         parent_company_name=args.parent_company,
     )
 
-    out_json = json.dumps(result, indent=2)
+    out_json = _dumps(result)
     if args.out:
         Path(args.out).parent.mkdir(parents=True, exist_ok=True)
-        Path(args.out).write_text(out_json, encoding="utf-8")
+        Path(args.out).write_bytes(out_json)
     else:
-        print(out_json)
+        print(out_json.decode("utf-8"))
     return 0
 
 def extract_debt_instruments_from_debt_note(
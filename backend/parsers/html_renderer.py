@@ -14,10 +14,28 @@ CLI:
 from __future__ import annotations
 
 import argparse
+import calendar
 import html
 import json
+import os
+import re
+import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+try:
+    import orjson
+
+    def _loads(data: bytes) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # stdlib json also accepts NaN/Infinity and ints beyond 64 bits
+            return json.loads(data)
+except ImportError:  # pragma: no cover
+    def _loads(data: bytes) -> Any:
+        return json.loads(data)
 
 
 # ----------------------------
@@ -63,8 +81,15 @@ FINAL_SPACER_RIGHT = "border-top:none; border-bottom:1px solid #000; border-left
 # Formatting
 # ----------------------------
 
+_ESCAPE_RE = re.compile(r"[<>&\"']")
+
+
 def esc(x: Any) -> str:
-    return "" if x is None else html.escape(str(x))
+    if x is None:
+        return ""
+    s = x if type(x) is str else str(x)
+    # Most cells have nothing to escape; one scan beats html.escape's five replaces
+    return s if _ESCAPE_RE.search(s) is None else html.escape(s)
 
 
 def _is_num(x: Any) -> bool:
@@ -88,24 +113,28 @@ def _is_num(x: Any) -> bool:
 #     # instrument cells in AAP show 3dp frequently; enforce 3dp for numeric
 #     return f"{v:,.3f}"
 
+_INT_EXACT = 2 ** 53
+
+
 def fmt_mm(x: Any, *, force_3dp: bool = False, parens_if_negative: bool = False) -> str:
     if x is None or x == "":
         return ""
+    # Whole numbers trim to no decimals anyway; beyond 2**53 the float round-trip below is lossy
+    if type(x) is int and not force_3dp and not (parens_if_negative and x < 0) and -_INT_EXACT <= x <= _INT_EXACT:
+        return format(x, ",")
     if not isinstance(x, (int, float)) or isinstance(x, bool):
         return str(x)
 
     v = float(x)
 
     if parens_if_negative and v < 0:
-        return f"({abs(v):,.3f})"
+        return "(" + format(-v, ",.3f") + ")"
 
     if force_3dp:
-        return f"{v:,.3f}"
+        return format(v, ",.3f")
 
     # ✅ instrument values: trim trailing zeros like AAP (299.110 -> 299.11)
-    s = f"{v:,.3f}"
-    s = s.rstrip("0").rstrip(".")
-    return s
+    return format(v, ",.3f").rstrip("0").rstrip(".")
 
 # def fmt_coupon(c: Any) -> str:
 #     if c is None:
@@ -133,9 +162,24 @@ def fmt_mm(x: Any, *, force_3dp: bool = False, parens_if_negative: bool = False)
 #     except Exception:
 #         return t
 
-import re
+_COUPON_RE = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+
 
 def fmt_coupon(c: Any, instrument_name: str = "") -> str:
+    # Text coupons (and names, when there is no coupon) repeat across tranches, so they are cached.
+    # Numbers are not: 0.0 == -0.0 would share a cache slot but format differently.
+    name = instrument_name or ""
+    if (c is None or type(c) is str) and type(name) is str:
+        return _fmt_coupon_text(c, name if c in (None, "") else "")
+    return _fmt_coupon(c, name)
+
+
+@lru_cache(maxsize=1024)
+def _fmt_coupon_text(c: Optional[str], instrument_name: str) -> str:
+    return _fmt_coupon(c, instrument_name)
+
+
+def _fmt_coupon(c: Any, instrument_name: str) -> str:
     # If explicitly variable
     if isinstance(c, str) and c.strip().lower() == "variable":
         return "variable"
@@ -148,51 +192,109 @@ def fmt_coupon(c: Any, instrument_name: str = "") -> str:
             return str(c)
 
     # Otherwise, try to extract from instrument name like "5.90 %"
-    m = re.search(r"(\d+(?:\.\d+)?)\s*%", instrument_name or "")
+    m = _COUPON_RE.search(instrument_name or "")
     if m:
         return f"{float(m.group(1)):.2f}"
 
     return ""
 
-def tr(cells: List[str]) -> str:
-    return "<tr>" + "".join(cells) + "</tr>"
+# Cell open tags are baked once per style; rows append fragments to one shared list
+TD_CLOSE = "</td>"
+TH_CLOSE = "</th>"
+
+
+def _td_open(style: str) -> str:
+    return f'<td style="{style}">'
+
+
+def _th_open(style: str) -> str:
+    return f'<th style="{style}">'
+
+
+TD_LEFT_OPEN = _td_open(TD_LEFT)
+TD_RIGHT_OPEN = _td_open(TD_RIGHT)
+SPACER_LEFT_OPEN = _td_open(SPACER_LEFT)
+SPACER_RIGHT_OPEN = _td_open(SPACER_RIGHT)
+FINAL_SPACER_LEFT_OPEN = _td_open(FINAL_SPACER_LEFT)
+FINAL_SPACER_RIGHT_OPEN = _td_open(FINAL_SPACER_RIGHT)
+SUBTOTAL_LEFT_OPEN = _td_open(SUBTOTAL_LEFT)
+SUBTOTAL_RIGHT_OPEN = _td_open(SUBTOTAL_RIGHT)
+NETDEBT_LEFT_OPEN = _td_open(NETDEBT_LEFT)
+NETDEBT_RIGHT_OPEN = _td_open(NETDEBT_RIGHT)
+EV_LEFT_OPEN = _td_open(EV_LEFT)
+EV_RIGHT_OPEN = _td_open(EV_RIGHT)
+HEADER_TH_LEFT_OPEN = _th_open(HEADER_TH_LEFT)
+HEADER_TH_RIGHT_OPEN = _th_open(HEADER_TH_RIGHT)
+ISSUER_TH_LEFT_OPEN = _th_open(ISSUER_TH_LEFT)
+ISSUER_TH_RIGHT_OPEN = _th_open(ISSUER_TH_RIGHT)
+NOTES_TH_OPEN = _th_open(NOTES_TH)
+
+# Runs of empty cells, rendered once at import
+TD_RIGHT_EMPTY = TD_RIGHT_OPEN + TD_CLOSE
+TD_RIGHT_EMPTY_5 = TD_RIGHT_EMPTY * 5
+TD_RIGHT_EMPTY_7 = TD_RIGHT_EMPTY * 7
+SUBTOTAL_TAIL = (SUBTOTAL_RIGHT_OPEN + TD_CLOSE) * 5 + "</tr>"
+NETDEBT_TAIL = (NETDEBT_RIGHT_OPEN + TD_CLOSE) * 5 + "</tr>"
+EV_TAIL = (EV_RIGHT_OPEN + TD_CLOSE) * 5 + "</tr>"
+PLAIN_TAIL = TD_RIGHT_EMPTY_5 + "</tr>"
+NOTES_TAIL = TD_RIGHT_EMPTY_7 + "</tr>"
+ISSUER_TAIL = (ISSUER_TH_RIGHT_OPEN + TH_CLOSE) * 7 + "</tr>"
+SPACER_ROW = "<tr>" + SPACER_LEFT_OPEN + TD_CLOSE + (SPACER_RIGHT_OPEN + TD_CLOSE) * 7 + "</tr>"
+FINAL_SPACER_ROW = (
+    "<tr>" + FINAL_SPACER_LEFT_OPEN + TD_CLOSE + (FINAL_SPACER_RIGHT_OPEN + TD_CLOSE) * 7 + "</tr>"
+)
+
+# Eight %s slots, filled with already-escaped cell text (styles contain no "%")
+_INSTRUMENT_ROW_TMPL = "<tr>" + TD_LEFT_OPEN + "%s" + TD_CLOSE + (TD_RIGHT_OPEN + "%s" + TD_CLOSE) * 7 + "</tr>"
 
 
-def th(text: str, style: str) -> str:
-    return f'<th style="{style}">{esc(text)}</th>'
+def td(parts: List[str], text: Any, open_tag: str) -> None:
+    parts += (open_tag, esc(text), TD_CLOSE)
 
 
-def td(text: str, style: str) -> str:
-    return f'<td style="{style}">{esc(text)}</td>'
+def th(parts: List[str], text: Any, open_tag: str) -> None:
+    parts += (open_tag, esc(text), TH_CLOSE)
 
 
-def spacer(final: bool = False) -> str:
-    if final:
-        return tr([td("", FINAL_SPACER_LEFT)] + [td("", FINAL_SPACER_RIGHT) for _ in range(7)])
-    return tr([td("", SPACER_LEFT)] + [td("", SPACER_RIGHT) for _ in range(7)])
+def spacer(parts: List[str], final: bool = False) -> None:
+    parts.append(FINAL_SPACER_ROW if final else SPACER_ROW)
 
 
 # ----------------------------
 # Rows (AAP layout)
 # ----------------------------
 
-def header_row() -> str:
-    return tr([
-        th("Instrument Name", HEADER_TH_LEFT),
-        th("Amount Outstanding ($mm)", HEADER_TH_RIGHT),
-        th("Amount Available ($mm)", HEADER_TH_RIGHT),
-        th("Coupon (%)", HEADER_TH_RIGHT),
-        th("Maturity", HEADER_TH_RIGHT),
-        th("Priority", HEADER_TH_RIGHT),
-        th("Parent Issuer", HEADER_TH_RIGHT),
-        th("Issue Date", HEADER_TH_RIGHT),
-    ])
+def header_row(parts: List[str]) -> None:
+    parts.append("<tr>")
+    th(parts, "Instrument Name", HEADER_TH_LEFT_OPEN)
+    th(parts, "Amount Outstanding ($mm)", HEADER_TH_RIGHT_OPEN)
+    th(parts, "Amount Available ($mm)", HEADER_TH_RIGHT_OPEN)
+    th(parts, "Coupon (%)", HEADER_TH_RIGHT_OPEN)
+    th(parts, "Maturity", HEADER_TH_RIGHT_OPEN)
+    th(parts, "Priority", HEADER_TH_RIGHT_OPEN)
+    th(parts, "Parent Issuer", HEADER_TH_RIGHT_OPEN)
+    th(parts, "Issue Date", HEADER_TH_RIGHT_OPEN)
+    parts.append("</tr>")
+
+_MONTHS = (
+    "", "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+)
+_ISO_DATE = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2})")
+
 
+# Unused: render() never calls this; instrument_row prints issue_date exactly as given
 def fmt_issue_date(iso_date: Optional[str]) -> str:
     from datetime import datetime
 
     if not iso_date:
         return ""
+    # Plain YYYY-MM-DD is sliced directly; anything else (e.g. "2023-3-9") goes through strptime
+    m = _ISO_DATE.fullmatch(iso_date) if type(iso_date) is str else None
+    if m:
+        y, mo, d = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        if y >= 1000 and 1 <= mo <= 12 and 1 <= d <= calendar.monthrange(y, mo)[1]:
+            return f"{_MONTHS[mo]} {d}, {m.group(1)}"
     try:
         dt = datetime.strptime(iso_date, "%Y-%m-%d")
         # AAP format: "March 9, 2023" (no leading zero)
@@ -201,8 +303,10 @@ def fmt_issue_date(iso_date: Optional[str]) -> str:
         return str(iso_date)
 
 
-def issuer_row(issuer: str) -> str:
-    return tr([th(issuer, ISSUER_TH_LEFT)] + [th("", ISSUER_TH_RIGHT) for _ in range(7)])
+def issuer_row(parts: List[str], issuer: str) -> None:
+    parts.append("<tr>")
+    th(parts, issuer, ISSUER_TH_LEFT_OPEN)
+    parts.append(ISSUER_TAIL)
 
 #
 # def instrument_row(inst: Dict[str, Any]) -> str:
@@ -222,100 +326,94 @@ def issuer_row(issuer: str) -> str:
 #     ])
 
 
-def instrument_row(inst: Dict[str, Any]) -> str:
+def instrument_row(parts: List[str], inst: Dict[str, Any]) -> None:
     name = inst.get("instrument_name", "") or ""
-    return tr([
-        td(name, TD_LEFT),
-        td(fmt_mm(inst.get("amount_outstanding_mm")), TD_RIGHT),
-        td(fmt_mm(inst.get("amount_available_mm")), TD_RIGHT),
-        td(fmt_coupon(inst.get("coupon_percent"), name), TD_RIGHT),
-        td(inst.get("maturity_year", "") or "", TD_RIGHT),
-        td(inst.get("priority", "") or "", TD_RIGHT),
-        td(inst.get("parent_issuer", "") or "", TD_RIGHT),
-        td(inst.get("issue_date", "") or "", TD_RIGHT),
-    ])
+    parts.append(_INSTRUMENT_ROW_TMPL % (
+        esc(name),
+        esc(fmt_mm(inst.get("amount_outstanding_mm"))),
+        esc(fmt_mm(inst.get("amount_available_mm"))),
+        esc(fmt_coupon(inst.get("coupon_percent"), name)),
+        esc(inst.get("maturity_year", "") or ""),
+        esc(inst.get("priority", "") or ""),
+        esc(inst.get("parent_issuer", "") or ""),
+        esc(inst.get("issue_date", "") or ""),
+    ))
+
+
+def _total_row(parts: List[str], title: str, value: str, left: str, right: str, tail: str, second: str = "") -> None:
+    # Label, value, an optional second value, then the style's pre-rendered empty tail
+    parts.append("<tr>")
+    td(parts, title, left)
+    td(parts, value, right)
+    td(parts, second, right)
+    parts.append(tail)
 
 
 # def subtotal_row(title: str, total_mm: float) -> str:
-def subtotal_row(title: str, total_debt_mm: float) -> str:
-    return tr([
-        td(title, SUBTOTAL_LEFT),
-        # td(fmt_mm(total_mm, force_3dp=True), SUBTOTAL_RIGHT),
-        td(fmt_mm(total_debt_mm, force_3dp=True), SUBTOTAL_RIGHT),
-        td("0", SUBTOTAL_RIGHT),
-        td("", SUBTOTAL_RIGHT),
-        td("", SUBTOTAL_RIGHT),
-        td("", SUBTOTAL_RIGHT),
-        td("", SUBTOTAL_RIGHT),
-        td("", SUBTOTAL_RIGHT),
-    ])
-
-
-def cash_row(cash_mm: float) -> str:
-    return tr([
-        td("-  Cash and cash equivalents", TD_LEFT),
-        td(fmt_mm(-abs(cash_mm), force_3dp=True, parens_if_negative=True), TD_RIGHT),
-        td("", TD_RIGHT), td("", TD_RIGHT), td("", TD_RIGHT), td("", TD_RIGHT), td("", TD_RIGHT), td("", TD_RIGHT),
-    ])
-
-
-def net_debt_row(net_debt_mm: float) -> str:
-    return tr([
-        td("Net Debt", NETDEBT_LEFT),
-        td(fmt_mm(net_debt_mm, force_3dp=True), NETDEBT_RIGHT),
-        td("", NETDEBT_RIGHT), td("", NETDEBT_RIGHT), td("", NETDEBT_RIGHT),
-        td("", NETDEBT_RIGHT), td("", NETDEBT_RIGHT), td("", NETDEBT_RIGHT),
-    ])
-
-
-def plus_line(label: str, value_mm: float) -> str:
+def subtotal_row(parts: List[str], title: str, total_debt_mm: float) -> None:
+    # td(fmt_mm(total_mm, force_3dp=True), SUBTOTAL_RIGHT),
+    _total_row(parts, title, fmt_mm(total_debt_mm, force_3dp=True), SUBTOTAL_LEFT_OPEN, SUBTOTAL_RIGHT_OPEN, SUBTOTAL_TAIL, second="0")
+
+
+def cash_row(parts: List[str], cash_mm: float) -> None:
+    value = fmt_mm(-abs(cash_mm), force_3dp=True, parens_if_negative=True)
+    _total_row(parts, "-  Cash and cash equivalents", value, TD_LEFT_OPEN, TD_RIGHT_OPEN, PLAIN_TAIL)
+
+
+def net_debt_row(parts: List[str], net_debt_mm: float) -> None:
+    _total_row(parts, "Net Debt", fmt_mm(net_debt_mm, force_3dp=True), NETDEBT_LEFT_OPEN, NETDEBT_RIGHT_OPEN, NETDEBT_TAIL)
+
+
+def plus_line(parts: List[str], label: str, value_mm: float) -> None:
     # Market cap is shown without decimals in AAP if it's an integer
     if abs(value_mm - round(value_mm)) < 1e-9:
         vtxt = f"{int(round(value_mm)):,}"
     else:
         vtxt = fmt_mm(value_mm)
 
-    return tr([
-        td(f"+  {label}", TD_LEFT),
-        td(vtxt, TD_RIGHT),
-        td("", TD_RIGHT), td("", TD_RIGHT), td("", TD_RIGHT), td("", TD_RIGHT), td("", TD_RIGHT), td("", TD_RIGHT),
-    ])
+    _total_row(parts, f"+  {label}", vtxt, TD_LEFT_OPEN, TD_RIGHT_OPEN, PLAIN_TAIL)
 
 
-def enterprise_value_row(ev_mm: float) -> str:
-    return tr([
-        td("Enterprise Value", EV_LEFT),
-        td(fmt_mm(ev_mm, force_3dp=True), EV_RIGHT),
-        td("", EV_RIGHT), td("", EV_RIGHT), td("", EV_RIGHT), td("", EV_RIGHT), td("", EV_RIGHT), td("", EV_RIGHT),
-    ])
+def enterprise_value_row(parts: List[str], ev_mm: float) -> None:
+    _total_row(parts, "Enterprise Value", fmt_mm(ev_mm, force_3dp=True), EV_LEFT_OPEN, EV_RIGHT_OPEN, EV_TAIL)
 
 
-def notes_rows(notes: List[str]) -> List[str]:
+def notes_rows(parts: List[str], notes: List[str]) -> None:
     if not notes:
-        return []
-    rows: List[str] = []
-    rows.append(tr([th("Notes:", NOTES_TH)] + [td("", TD_RIGHT) for _ in range(7)]))
+        return
+    parts.append("<tr>")
+    th(parts, "Notes:", NOTES_TH_OPEN)
+    parts.append(NOTES_TAIL)
     for i, n in enumerate(notes, start=1):
-        rows.append(tr([td(f"{i}. {n}", TD_LEFT)] + [td("", TD_RIGHT) for _ in range(7)]))
-    rows.append(spacer(final=True))
-    return rows
+        parts.append("<tr>")
+        td(parts, f"{i}. {n}", TD_LEFT_OPEN)
+        parts.append(NOTES_TAIL)
+    spacer(parts, final=True)
 
 
 # ----------------------------
 # Render
 # ----------------------------
 
-def render(doc: Dict[str, Any]) -> str:
-    rows: List[str] = [header_row(), spacer()]
+def render_iter(doc: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yield the table HTML in chunks (roughly one per priority group),
+    so callers can stream it instead of holding the whole document.
+    """
+    parts: List[str] = [f'<table style="{TABLE_STYLE}">']
+    header_row(parts)
+    spacer(parts)
 
     for g in doc.get("issuer_groups", []) or []:
-        rows.append(issuer_row(g.get("issuer", "")))
+        issuer_row(parts, g.get("issuer", ""))
         for pg in g.get("priority_groups", []) or []:
             for inst in pg.get("instruments", []) or []:
-                rows.append(instrument_row(inst))
+                instrument_row(parts, inst)
             subtotal = (pg.get("subtotal") or {}).get("subtotal_outstanding_mm") or 0.0
-            rows.append(subtotal_row(f"Total {pg.get('priority','')}", float(subtotal)))
-            rows.append(spacer())
+            subtotal_row(parts, f"Total {pg.get('priority','')}", float(subtotal))
+            spacer(parts)
+            yield "".join(parts)
+            parts.clear()
 
     total_debt = float(doc.get("total_debt_mm") or 0.0)
     cash = float(doc.get("cash_mm") or 0.0)
@@ -324,18 +422,23 @@ def render(doc: Dict[str, Any]) -> str:
     mkt = float(doc.get("market_cap_mm") or 0.0)
     ev = float(doc.get("enterprise_value_mm") or 0.0)
 
-    rows.append(subtotal_row("Total Debt", total_debt))
-    rows.append(spacer())
-    rows.append(cash_row(cash))
-    rows.append(net_debt_row(net_debt))
-    rows.append(plus_line("Noncontrolling interests", nci))
-    rows.append(plus_line("Market capitalization", mkt))
-    rows.append(enterprise_value_row(ev))
-    rows.append(spacer())
+    subtotal_row(parts, "Total Debt", total_debt)
+    spacer(parts)
+    cash_row(parts, cash)
+    net_debt_row(parts, net_debt)
+    plus_line(parts, "Noncontrolling interests", nci)
+    plus_line(parts, "Market capitalization", mkt)
+    enterprise_value_row(parts, ev)
+    spacer(parts)
 
-    rows.extend(notes_rows(doc.get("notes", []) or []))
+    notes_rows(parts, doc.get("notes", []) or [])
 
-    return f'<table style="{TABLE_STYLE}">' + "".join(rows) + "</table>"
+    parts.append("</table>")
+    yield "".join(parts)
+
+
+def render(doc: Dict[str, Any]) -> str:
+    return "".join(render_iter(doc))
 
 
 
@@ -345,15 +448,19 @@ def main() -> None:
     ap.add_argument("--out", default=None, help="Output HTML path (optional)")
     args = ap.parse_args()
 
-    doc = json.loads(Path(args.built_json).read_text(encoding="utf-8"))
-    out_html = render(doc)
+    doc = _loads(Path(args.built_json).read_bytes())
 
     if args.out:
         p = Path(args.out)
         p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(out_html, encoding="utf-8")
+        # Stream into a sibling file so a failed render never leaves a half-written output
+        tmp = p.with_name(p.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.writelines(render_iter(doc))
+        os.replace(tmp, p)
     else:
-        print(out_html)
+        sys.stdout.writelines(render_iter(doc))
+        sys.stdout.write("\n")
 
 
 if __name__ == "__main__":
@@ -18,26 +18,37 @@ Output amounts are in $mm with 3 decimals:
 
 CLI:
   python lease_note_html_parser.py input/lease_note.html --period-end "December 28, 2024" --out output/lease_note_parsed.json
+  (add --include-html-snippets to keep the table HTML in each provenance)
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import os
 import re
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from bs4.element import Tag
 
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:  # pragma: no cover
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
 
 # ----------------------------
 # Models
 # ----------------------------
 
-@dataclass
+@dataclass(slots=True)
 class LeaseInstrument:
     instrument_name: str
     amount_outstanding_mm: Optional[float]
@@ -56,18 +67,29 @@ class LeaseInstrument:
 # Helpers
 # ----------------------------
 
+# Opt-in on-disk cache of parse results (LEASE_PARSER_CACHE=1), read once at import
+_DISK_CACHE = (os.getenv("LEASE_PARSER_CACHE") or "").strip().lower() in ("1", "true", "yes", "on")
+_DISK_CACHE_DIR = Path.home() / ".cache" / "lease_note_parser"
+
+_WS_RE = re.compile(r"\s+")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_NUM_RE = re.compile(r"\d+(\.\d+)?")
+# Thousands separators and the spaces _clean_ws leaves behind
+_NUM_STRIP = str.maketrans("", "", ", ")
+
+
 def _read_text(path: str | Path) -> str:
     return Path(path).read_text(encoding="utf-8", errors="ignore")
 
 
 def _clean_ws(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "")).strip()
+    return _WS_RE.sub(" ", s or "").strip()
 
 
 def _norm(s: str) -> str:
     s = (s or "").lower()
-    s = re.sub(r"[^\w\s]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _PUNCT_RE.sub(" ", s)
+    s = _WS_RE.sub(" ", s).strip()
     return s
 
 
@@ -80,13 +102,14 @@ def _parse_number(cell: str) -> Optional[float]:
     t = _clean_ws(cell)
     if not t or t in {"-", "—"}:
         return None
-    t = t.replace("$", "").replace("US$", "").strip()
+    # "US$" needs no pass of its own: dropping "$" leaves "US", which fails the match anyway
+    t = t.replace("$", "").strip()
     neg = False
     if t.startswith("(") and t.endswith(")"):
         neg = True
         t = t[1:-1].strip()
-    t = t.replace(",", "").replace(" ", "")
-    if not re.fullmatch(r"\d+(\.\d+)?", t):
+    t = t.translate(_NUM_STRIP)
+    if not _NUM_RE.fullmatch(t):
         return None
     v = float(t)
     return -v if neg else v
@@ -107,22 +130,26 @@ def _html_snippet(tag: Tag, max_chars: int = 1200) -> str:
     return h[:max_chars] + ("..." if len(h) > max_chars else "")
 
 
+def _expand_cells(cells: List[Tag], out: List[str]) -> None:
+    for cell in cells:
+        text = _clean_ws(cell.get_text(" ", strip=True))
+        cs = cell.get("colspan")
+        if cs is None or cs == "1":
+            out.append(text)
+        else:
+            out.extend([text] * max(1, int(cs or 1)))
+
+
 def _expand_row(tr: Tag) -> List[str]:
     """
     Expand colspans by duplicating the text to keep indexing stable.
     """
     out: List[str] = []
-    for cell in tr.find_all(["th", "td"], recursive=False):
-        text = _clean_ws(cell.get_text(" ", strip=True))
-        colspan = int(cell.get("colspan") or 1)
-        out.extend([text] * max(1, colspan))
+    _expand_cells(tr.find_all(["th", "td"], recursive=False), out)
 
     # fallback in case cells are nested strangely
     if not out:
-        for cell in tr.find_all(["th", "td"], recursive=True):
-            text = _clean_ws(cell.get_text(" ", strip=True))
-            colspan = int(cell.get("colspan") or 1)
-            out.extend([text] * max(1, colspan))
+        _expand_cells(tr.find_all(["th", "td"], recursive=True), out)
 
     return out
 
@@ -160,6 +187,9 @@ TARGETS: List[Tuple[str, str, str]] = [
     ("non current finance lease liabilities", "Non-current finance lease liabilities", "finance_lease"),
 ]
 
+# normalized label -> (pretty name, lease type)
+TARGETS_MAP: Dict[str, Tuple[str, str]] = {key: (pretty, typ) for key, pretty, typ in TARGETS}
+
 
 def _match_target(row: List[str]) -> Optional[Tuple[str, str, str]]:
     """
@@ -170,21 +200,73 @@ def _match_target(row: List[str]) -> Optional[Tuple[str, str, str]]:
         return None
     c0 = _norm(row[0])
     c1 = _norm(row[1]) if len(row) > 1 else ""
-    candidates = [c0, f"{c0} {c1}".strip()]
-
-    for key, pretty, typ in TARGETS:
-        for cand in candidates:
-            if cand == key:
-                return key, pretty, typ
+    # No target extends another by a word, so at most one distinct candidate can hit
+    for cand in (c0, f"{c0} {c1}".strip()):
+        hit = TARGETS_MAP.get(cand)
+        if hit:
+            return cand, hit[0], hit[1]
     return None
 
 
-def parse_lease_note_html(lease_note_html_path: str | Path, period_end_date_text: Optional[str]) -> Dict[str, Any]:
-    soup = BeautifulSoup(_read_text(lease_note_html_path), "lxml")
-    instruments: List[LeaseInstrument] = []
+def _disk_cache_file(path: str | Path, period_end_date_text: Optional[str], include_html_snippet: bool) -> Path:
+    st = os.stat(path)
+    key = f"{Path(path).resolve()}|{st.st_mtime_ns}|{st.st_size}|{period_end_date_text}|{include_html_snippet}"
+    return _DISK_CACHE_DIR / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+
+def parse_lease_note_html(
+    lease_note_html_path: str | Path,
+    period_end_date_text: Optional[str],
+    include_html_snippet: bool = True,
+) -> Dict[str, Any]:
+    """
+    With LEASE_PARSER_CACHE=1, results are cached under ~/.cache/lease_note_parser,
+    keyed by (path, mtime, size) plus the arguments; an unreadable entry is just re-parsed.
+    """
+    if not _DISK_CACHE:
+        return _parse_lease_note_html(lease_note_html_path, period_end_date_text, include_html_snippet)
+
+    cache_file = _disk_cache_file(lease_note_html_path, period_end_date_text, include_html_snippet)
+    try:
+        return json.loads(cache_file.read_bytes())
+    except (OSError, ValueError):
+        pass
+
+    result = _parse_lease_note_html(lease_note_html_path, period_end_date_text, include_html_snippet)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(_dumps(result))
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass  # caching is best-effort
+    return result
+
+
+def _parse_lease_note_html(
+    lease_note_html_path: str | Path,
+    period_end_date_text: Optional[str],
+    include_html_snippet: bool,
+) -> Dict[str, Any]:
+    raw = _read_text(lease_note_html_path)
+    # Keyed by (name, amount, type): repeated iXBRL tables keep their first occurrence
+    instruments: Dict[Tuple[str, float, str], LeaseInstrument] = {}
     notes: List[str] = []
 
-    for ti, table in enumerate(soup.find_all("table")):
+    # Every target label ends in "liabilities"; without it there is nothing to parse
+    tables = []
+    if "liabilities" in raw.lower():
+        # Only tables are read, so the tree is built for them alone
+        soup = BeautifulSoup(raw, "lxml", parse_only=SoupStrainer("table"))
+        tables = soup.find_all("table")
+
+    for ti, table in enumerate(tables):
+        # Cheap pre-check before building the matrix: a word in the cell text always comes
+        # from a single text node, so both words must show up in the table's raw text
+        text = table.get_text().lower()
+        if "liabilities" not in text or "lease" not in text:
+            continue
+
         matrix = _table_matrix(table)
         if len(matrix) < 3:
             continue
@@ -193,6 +275,9 @@ def parse_lease_note_html(lease_note_html_path: str | Path, period_end_date_text
         if "lease liabilities" not in joined:
             continue
 
+        # Serialized once per table, and only if asked for (bonus citations use it)
+        snippet = _html_snippet(table) if include_html_snippet else None
+
         for row in matrix:
             hit = _match_target(row)
             if not hit:
@@ -216,44 +301,36 @@ def parse_lease_note_html(lease_note_html_path: str | Path, period_end_date_text
 
             amount_mm = round(_to_mm_from_lease_table(raw), 3)
 
-            instruments.append(
-                LeaseInstrument(
-                    instrument_name=pretty,
-                    amount_outstanding_mm=amount_mm,
-                    amount_available_mm=None,
-                    coupon_percent=None,
-                    maturity_year="Various",
-                    priority="Senior Secured",
-                    parent_issuer=None,
-                    issue_date=None,
-                    instrument_type=lease_type,
-                    lien_level=None,
-                    provenance={
-                        "table_index": ti,
-                        "period_end_date_text": period_end_date_text,
-                        "value_cell_index": used_idx,
-                        "row_text": " | ".join(_clean_ws(c) for c in row),
-                        "html_snippet": _html_snippet(table),
-                    },
-                )
-            )
+            key = (pretty, amount_mm, lease_type)
+            if key in instruments:
+                continue
 
-    # Deduplicate repeated iXBRL tables
-    deduped: List[LeaseInstrument] = []
-    seen = set()
-    for ins in instruments:
-        key = (ins.instrument_name, ins.amount_outstanding_mm, ins.instrument_type)
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(ins)
+            instruments[key] = LeaseInstrument(
+                instrument_name=pretty,
+                amount_outstanding_mm=amount_mm,
+                amount_available_mm=None,
+                coupon_percent=None,
+                maturity_year="Various",
+                priority="Senior Secured",
+                parent_issuer=None,
+                issue_date=None,
+                instrument_type=lease_type,
+                lien_level=None,
+                provenance={
+                    "table_index": ti,
+                    "period_end_date_text": period_end_date_text,
+                    "value_cell_index": used_idx,
+                    "row_text": " | ".join(_clean_ws(c) for c in row),
+                    "html_snippet": snippet,
+                },
+            )
 
-    if not deduped:
+    if not instruments:
         notes.append("No lease instruments extracted (pattern may differ in this filing).")
 
     return {
         "period_end_date_text": period_end_date_text,
-        "instruments": [asdict(x) for x in deduped],
+        "instruments": [asdict(x) for x in instruments.values()],
         "notes": notes,
     }
 
@@ -263,16 +340,22 @@ def main() -> None:
     ap.add_argument("lease_note_html", help="Path to lease_note.html")
     ap.add_argument("--period-end", default=None, help='e.g., "December 28, 2024" (optional, for provenance)')
     ap.add_argument("--out", default=None, help="Write JSON output to this path")
+    ap.add_argument(
+        "--include-html-snippets",
+        action="store_true",
+        help="Keep up to 1200 chars of table HTML in each provenance (off by default; much larger output)",
+    )
     args = ap.parse_args()
 
-    result = parse_lease_note_html(args.lease_note_html, args.period_end)
+    result = parse_lease_note_html(args.lease_note_html, args.period_end, include_html_snippet=args.include_html_snippets)
 
+    out_json = _dumps(result)
     if args.out:
         p = Path(args.out)
         p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        p.write_bytes(out_json)
     else:
-        print(json.dumps(result, indent=2))
+        print(out_json.decode("utf-8"))
 
 
 if __name__ == "__main__":
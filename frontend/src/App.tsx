@@ -14,7 +14,8 @@ type JobInfo = {
 
 type ResultPayload = {
   job_id: string;
-  html: string;
+  html?: string;
+  html_url: string;
   built: any;
   ticker?: string | null;
   market_cap_mm?: number | null;
@@ -165,8 +166,17 @@ export default function App() {
       return;
     }
 
-    // Your backend returns JSON; html content is in rb.html based on your app
-    setResult(rb as ResultPayload);
+    // The result JSON carries only built + meta; the rendered HTML is fetched from html_url
+    const payload = rb as ResultPayload;
+    if (payload.html === undefined && payload.html_url) {
+      const hr = await fetch(`${API_BASE}${payload.html_url}`);
+      if (!hr.ok) {
+        setMsg(`Failed fetching rendered HTML (${hr.status})`);
+        return;
+      }
+      payload.html = await hr.text();
+    }
+    setResult(payload);
   }
 
   const htmlDownloadUrl = jobId ? `${API_BASE}/api/jobs/${jobId}/download/html` : "";